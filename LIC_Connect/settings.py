@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -93,6 +94,56 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared between gunicorn workers so per-process caches (e.g. the current
+# semester) can be invalidated everywhere. Uses Redis when REDIS_URL is set,
+# otherwise a file-based cache shared by all workers on the host.
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('DJANGO_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'lic_connect_cache')),
+        }
+    }
+
+
+# Tests get a cache of their own (they clear it); see LIC_Connect/test_runner.py
+TEST_RUNNER = 'LIC_Connect.test_runner.IsolatedCacheTestRunner'
+
+# Finished semester exports, keyed by a watermark of the semester's data
+# (see students/export_jobs.py). Every web worker must see this directory:
+# with more than one host, point DJANGO_EXPORT_DIR at a shared volume.
+EXPORT_CACHE_DIR = os.getenv('DJANGO_EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'lic_connect_exports'))
+EXPORT_WORKERS = int(os.getenv('DJANGO_EXPORT_WORKERS', '1'))
+
+
+# Threads that downscale uploaded receipts and make their thumbnails
+# (students/receipts.py). 0 processes them inline after commit.
+RECEIPT_WORKERS = int(os.getenv('DJANGO_RECEIPT_WORKERS', '2'))
+
+# Activity logs are buffered per worker and written in batches by a
+# background thread (students/activity_log.py). Set DJANGO_ACTIVITY_LOG_BUFFERED=0
+# to write every entry as it happens. Batches that fail to write are retried
+# on the next flush, keeping at most ACTIVITY_LOG_MAX_BUFFERED entries.
+ACTIVITY_LOG_BUFFERED = os.getenv('DJANGO_ACTIVITY_LOG_BUFFERED', '1') == '1'
+ACTIVITY_LOG_BATCH_SIZE = int(os.getenv('DJANGO_ACTIVITY_LOG_BATCH_SIZE', '100'))
+ACTIVITY_LOG_FLUSH_INTERVAL = float(os.getenv('DJANGO_ACTIVITY_LOG_FLUSH_INTERVAL', '2'))
+ACTIVITY_LOG_MAX_BUFFERED = int(os.getenv('DJANGO_ACTIVITY_LOG_MAX_BUFFERED', '10000'))
+
+
+# Processes used to hash passwords for bulk student operations
+# (students/hashing.py); defaults to one per CPU. 0 or 1 hashes inline.
+PASSWORD_HASH_WORKERS = int(os.getenv('DJANGO_PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
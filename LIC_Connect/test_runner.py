@@ -0,0 +1,29 @@
+import shutil
+import tempfile
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class IsolatedCacheTestRunner(DiscoverRunner):
+    """Runs the tests against a file-based cache in a temporary directory.
+
+    The tests clear the cache, and the configured one (Redis, or the shared
+    cache directory) may be what a server on the same host is using. The
+    file-based backend is kept because locks.py's flock path needs it."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='lic_connect_test_cache')
+        self.cache_settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': self.cache_dir,
+            }
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
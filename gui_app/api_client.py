@@ -0,0 +1,83 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HTTP client for the kiosk, used instead of direct ORM access when the GUI
+# runs in API mode (LIC_API_URL). One keep-alive session per kiosk talks to
+# the student endpoints, so the kiosk needs neither Django nor database
+# credentials.
+
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class StudentApiClient:
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=3, kiosk=''):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.kiosk = kiosk
+
+        # Retry failed connects and gateway errors (the request never reached
+        # Django), but not read timeouts: a login or logout may have been
+        # applied even though its response was lost.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'POST']),
+            backoff_factor=0.3,
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(max_retries=retry, pool_maxsize=2))
+        self.session.mount('https://', HTTPAdapter(max_retries=retry, pool_maxsize=2))
+
+    def close(self):
+        self.session.close()
+
+    def _post(self, path, data=None, json=None):
+        try:
+            response = self.session.post(f'{self.base_url}{path}', data=data, json=json, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ApiError(f"Could not reach the server: {e}") from e
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        if response.status_code >= 400:
+            raise ApiError(payload.get('error', f"Server error ({response.status_code})"), response.status_code)
+        return payload
+
+    def login(self, student_id, password):
+        """Returns the student's remaining minutes. A 401 ApiError means the
+        password is still the default and must be changed first."""
+        payload = self._post('/api/login-student/', {'studentID': student_id, 'password': password, 'kiosk': self.kiosk})
+        return payload['time_left']
+
+    def logout(self, student_id):
+        self._post('/api/logout-student/', {'studentID': student_id})
+
+    def change_password(self, student_id, new_password):
+        self._post('/api/change-password-student/', {'studentID': student_id, 'new_password': new_password})
+
+    def history(self, student_id, cursor=None, page_size=50):
+        """One page of the current semester's sessions, newest first. Returns
+        (sessions, next_cursor); next_cursor is None on the last page."""
+        data = {'studentID': student_id, 'paginate': 'true', 'page_size': page_size}
+        if cursor:
+            data['cursor'] = cursor
+        payload = self._post('/api/check-history-student/', data)
+        return payload['sessions'], payload.get('next')
+
+    def sync_events(self, events):
+        """Send a batch from the offline journal; returns the accepted event ids."""
+        return self._post('/api/kiosk-events/', json={'kiosk': self.kiosk, 'events': events})['accepted']
@@ -0,0 +1,114 @@
+"""Time kiosk cold start and login/logout screen switches.
+
+Uses a stub backend, so no server or database is needed. Tk still needs a
+display; on a headless box run it under Xvfb:
+
+    xvfb-run python gui_app/bench_startup.py --starts 5 --switches 50
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+class StubBackend:
+    def login(self, student_id, password, login_time):
+        return 60
+
+    def sync_events(self, events):
+        return [event['event_id'] for event in events]
+
+    def change_password(self, student_id, new_password):
+        pass
+
+    def history(self, student_id, cursor=None):
+        return [], None
+
+
+def stub_journal():
+    from gui_app.journal import SessionJournal
+    return SessionJournal(':memory:', send=StubBackend().sync_events)
+
+
+def show_login_screen():
+    # Runs in a fresh interpreter: import the GUI and draw the login screen
+    start = time.perf_counter()
+    import tkinter as tk
+    import login
+    imported = time.perf_counter()
+
+    root = tk.Tk()
+    login.StudentApp(root, backend=StubBackend(), journal=stub_journal())
+    root.update()
+    shown = time.perf_counter()
+    root.destroy()
+    print(f"{(imported - start) * 1000:.1f} {(shown - start) * 1000:.1f}")
+
+
+def cold_starts(count):
+    results = []
+    for _ in range(count):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, __file__, '--child'], check=True, capture_output=True, text=True,
+        ).stdout
+        total = (time.perf_counter() - start) * 1000
+        imported, shown = map(float, output.split())
+        results.append((total, imported, shown))
+    return results
+
+
+def switches(count):
+    import tkinter as tk
+    import login
+
+    root = tk.Tk()
+    app = login.StudentApp(root, backend=StubBackend(), journal=stub_journal())
+    root.update()
+
+    to_menu, to_login = [], []
+    for _ in range(count):
+        app.entry1.insert(0, '21-0000-001')
+        app.entry2.insert(0, 'secret')
+
+        start = time.perf_counter()
+        app.login()
+        root.update()
+        to_menu.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        app.logout()
+        root.update()
+        to_login.append((time.perf_counter() - start) * 1000)
+
+    root.destroy()
+    return to_menu, to_login
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--starts', type=int, default=5)
+    parser.add_argument('--switches', type=int, default=50)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.child:
+        show_login_screen()
+        return
+
+    starts = cold_starts(options.starts)
+    print(f"cold start (process launch to login screen): {statistics.median(s[0] for s in starts):7.1f} ms median")
+    print(f"  module imports:                             {statistics.median(s[1] for s in starts):7.1f} ms")
+    print(f"  imports + first screen:                     {statistics.median(s[2] for s in starts):7.1f} ms")
+
+    to_menu, to_login = switches(options.switches)
+    print(f"login -> menu:  {statistics.median(to_menu):6.2f} ms median, {max(to_menu):6.2f} ms max")
+    print(f"logout -> login: {statistics.median(to_login):5.2f} ms median, {max(to_login):6.2f} ms max")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Local SQLite journal of the kiosk's logins and logouts. Events are written
+# here first and a background thread replays them to the server in batches,
+# so a logout during a network or database outage is not lost and the kiosk
+# goes straight back to the login screen. Each event gets a UUID; the server
+# ignores ids it has already applied (students/kiosk_events.py), so a batch
+# whose response was lost can simply be sent again.
+
+BATCH_SIZE = 50
+SYNC_INTERVAL = 5  # seconds between sync attempts
+MAX_BACKOFF = 300  # seconds, while the server stays unreachable
+
+
+def boot_time():
+    # Wall-clock time the monotonic clock counts from; it moves after a reboot
+    return time.time() - time.monotonic()
+
+
+class SessionJournal:
+    def __init__(self, path, send, batch_size=BATCH_SIZE, interval=SYNC_INTERVAL):
+        """send(events) delivers a batch and returns the event ids the server
+        accepted; those are dropped from the journal."""
+        self.send = send
+        self.batch_size = batch_size
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+        self.db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS events ('
+            ' seq INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' event_id TEXT NOT NULL UNIQUE,'
+            ' kind TEXT NOT NULL,'
+            ' student_id TEXT NOT NULL,'
+            ' occurred_at TEXT NOT NULL,'
+            ' monotonic REAL NOT NULL,'
+            ' boot REAL NOT NULL,'
+            ' consumed_minutes INTEGER)'
+        )
+
+    def record(self, kind, student_id, consumed_minutes=None):
+        event_id = str(uuid.uuid4())
+        with self.lock:
+            self.db.execute(
+                'INSERT INTO events (event_id, kind, student_id, occurred_at, monotonic, boot, consumed_minutes)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (event_id, kind, student_id, datetime.now(timezone.utc).isoformat(),
+                 time.monotonic(), boot_time(), consumed_minutes),
+            )
+        self.wake.set()
+        return event_id
+
+    def pending(self, limit=-1):
+        with self.lock:
+            rows = self.db.execute(
+                'SELECT event_id, kind, student_id, occurred_at, monotonic, boot, consumed_minutes'
+                ' FROM events ORDER BY seq LIMIT ?', (limit,),
+            ).fetchall()
+
+        now, boot = time.monotonic(), boot_time()
+        events = []
+        for event_id, kind, student_id, occurred_at, clock, event_boot, consumed_minutes in rows:
+            # The monotonic age only means something within the same boot
+            same_boot = abs(event_boot - boot) < 10
+            events.append({
+                'event_id': event_id,
+                'kind': kind,
+                'studentID': student_id,
+                'occurred_at': occurred_at,
+                'age': now - clock if same_boot else None,
+                'consumed_minutes': consumed_minutes,
+            })
+        return events
+
+    def sync(self):
+        """Send everything pending, one batch at a time. Returns the number of
+        events delivered; errors from send() propagate."""
+        delivered = 0
+        while True:
+            batch = self.pending(self.batch_size)
+            if not batch:
+                return delivered
+            accepted = self.send(batch)
+            with self.lock:
+                self.db.executemany('DELETE FROM events WHERE event_id = ?', [(event_id,) for event_id in accepted])
+            delivered += len(accepted)
+            if len(accepted) < len(batch):
+                return delivered
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='journal-sync', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        delay = self.interval
+        while not self.stopping.is_set():
+            self.wake.wait(delay)
+            self.wake.clear()
+            try:
+                self.sync()
+                delay = self.interval
+            except Exception:
+                # Keep the events and back off until the server is reachable
+                delay = min(delay * 2, MAX_BACKOFF)
+
+    def stop(self, timeout=5):
+        self.stopping.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        try:
+            self.sync()
+        except Exception:
+            pass
+        self.db.close()
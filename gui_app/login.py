@@ -1,14 +1,11 @@
 import tkinter as tk
 from tkinter import messagebox
-import MySQLdb
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import time
-from tkinter import PhotoImage
 import os
-from PIL import Image, ImageTk
-import django
+import socket
 import sys
-from django.conf import settings
 from pathlib import Path
 from tkinter import ttk
 from tkinter import Toplevel
@@ -18,26 +15,257 @@ from tkinter import Toplevel
 DJANGO_PROJECT_PATH = str(Path(__file__).resolve().parent.parent)
 sys.path.append(DJANGO_PROJECT_PATH)
 
-# Django setup
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LIC_Connect.settings')  # Replace with your actual settings module
-django.setup()
+from gui_app.journal import SessionJournal
+
+# Set LIC_API_URL (e.g. http://lic-server:8000) to run the kiosk against the
+# REST API instead of opening its own database connection through Django.
+# Talking to the database directly also needs REDIS_URL pointing at the
+# server's Redis: presence, the current-semester cache and the dashboard
+# versions live in the cache, and a kiosk writing them to a cache of its own
+# would leave the server's copies stale.
+API_URL = os.getenv('LIC_API_URL')
+
+# Cache backends that only the kiosk process (or host) would see
+LOCAL_CACHE_BACKENDS = ('LocMemCache', 'FileBasedCache', 'DummyCache')
+KIOSK_NAME = os.getenv('LIC_KIOSK_NAME') or socket.gethostname()
+
+# Logins and logouts are journaled locally and synced in the background, so
+# the kiosk keeps working while the server or database is unreachable
+JOURNAL_PATH = os.getenv('LIC_JOURNAL_PATH') or str(Path.home() / '.lic_kiosk_journal.sqlite3')
+
+LOGO_PATH = Path(__file__).resolve().parent / 'gui_logo.png'
+_logo = None
+
+
+def load_logo():
+    # Decoded and thumbnailed once per process (PIL is only imported here);
+    # every return to the login screen reuses the same image
+    global _logo
+    if _logo is None and LOGO_PATH.exists():
+        from PIL import Image, ImageTk
+        img = Image.open(LOGO_PATH)
+        img.thumbnail((100, 100))
+        _logo = ImageTk.PhotoImage(img)
+    return _logo
+
+
+class LoginRefused(Exception):
+    def __init__(self, message, info=False, change_password=False):
+        super().__init__(message)
+        self.message = message
+        self.info = info
+        self.change_password = change_password
+
+
+class OrmBackend:
+    # Talks to the database directly through the Django ORM
+
+    def __init__(self):
+        import django
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LIC_Connect.settings')  # Replace with your actual settings module
+        django.setup()
+
+        from django.conf import settings
+        from django.core.exceptions import ImproperlyConfigured
+        if settings.CACHES['default']['BACKEND'].endswith(LOCAL_CACHE_BACKENDS):
+            raise ImproperlyConfigured(
+                "The kiosk needs the server's shared cache (REDIS_URL) to use the database directly; "
+                "set LIC_API_URL to go through the API instead"
+            )
+
+    def login(self, student_id, password, login_time):
+        from django.contrib.auth.hashers import check_password
+        from students.accounting import start_session
+        from students.models import Student
+
+        student = Student.objects.filter(studentID=student_id).first()
+        if student is None or not check_password(password, student.password):
+            raise LoginRefused("Invalid StudentID or Password")
+        # Check if the user is already logged in
+        if student.is_logged_in:
+            raise LoginRefused("This student is already logged in.", info=True)
+        # Check for default password and force change
+        if password == '123456':
+            raise LoginRefused("Password change required.", change_password=True)
+        # Check if student has time left
+        if student.time_left == 0:
+            raise LoginRefused("No time left. Login not allowed.")
+        # None means another kiosk logged this student in since the checks above
+        if start_session(student, login_time, kiosk=KIOSK_NAME) is None:
+            raise LoginRefused("This student is already logged in.", info=True)
+        return student.time_left
+
+    def sync_events(self, events):
+        from students.kiosk_events import apply_events
+        from students.serializers import KioskEventSerializer
+
+        serializer = KioskEventSerializer(data=events, many=True)
+        serializer.is_valid(raise_exception=True)
+        return apply_events(KIOSK_NAME, serializer.validated_data)
+
+    def change_password(self, student_id, new_password):
+        from django.contrib.auth.hashers import make_password
+        from students.models import Student
+
+        student = Student.objects.get(studentID=student_id)
+        student.password = make_password(new_password)
+        student.save()
+
+    def history(self, student_id, cursor=None):
+        from students.history import history_page, semester_sessions
+        from students.semester import get_current_semester
+
+        sessions = semester_sessions(student_id, get_current_semester())
+        rows, next_cursor, _ = history_page(sessions, cursor)
+        return [
+            (
+                row['date'],
+                row['loginTime'].strftime("%H:%M:%S") if row['loginTime'] else '',
+                row['logoutTime'].strftime("%H:%M:%S") if row['logoutTime'] else 'Still logged in',
+                row['consumedTime'],
+            )
+            for row in rows
+        ], next_cursor
+
+
+class HttpBackend:
+    # Talks to the server's student endpoints; needs no Django install or
+    # database credentials on the kiosk
+
+    def __init__(self, base_url):
+        from gui_app.api_client import StudentApiClient
+        self.client = StudentApiClient(base_url, kiosk=KIOSK_NAME)
+
+    def login(self, student_id, password, login_time):
+        from gui_app.api_client import ApiError
+
+        try:
+            return self.client.login(student_id, password)
+        except ApiError as e:
+            if e.status == 401:
+                raise LoginRefused(e.message, change_password=True)
+            if e.message == "Already logged in":
+                raise LoginRefused("This student is already logged in.", info=True)
+            raise LoginRefused(e.message)
+
+    def sync_events(self, events):
+        return self.client.sync_events(events)
+
+    def change_password(self, student_id, new_password):
+        self.client.change_password(student_id, new_password)
+
+    def history(self, student_id, cursor=None):
+        sessions, next_cursor = self.client.history(student_id, cursor)
+        return [
+            (
+                session['date'],
+                (session['loginTime'] or '')[:8],
+                'Still logged in' if session['logoutTime'] == 'N/A' else session['logoutTime'][:8],
+                session['consumedTime'],
+            )
+            for session in sessions
+        ], next_cursor
+
+
+def make_backend():
+    return HttpBackend(API_URL) if API_URL else OrmBackend()
+
+
+class HistoryWindow:
+    # The current semester's sessions, newest first. Pages are fetched on the
+    # app's worker thread, so the countdown keeps ticking, and the next page
+    # is requested when the list is scrolled near its end.
+
+    def __init__(self, app, student_id):
+        self.app = app
+        self.student_id = student_id
+        self.next_cursor = None
+        self.loading = False
+
+        # Create a new window to display session history
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Session History")
+        self.window.geometry("500x300")
+
+        # Create a Treeview widget to display the history in tabular form
+        frame = tk.Frame(self.window)
+        frame.pack(expand=True, fill='both')
+        self.tree = ttk.Treeview(frame, columns=("Date", "Login Time", "Logout Time", "Time Consumed"), show="headings", height=10)
+        self.scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', expand=True, fill='both')
+
+        # Define column headings
+        self.tree.heading("Date", text="Date")
+        self.tree.heading("Login Time", text="Login")
+        self.tree.heading("Logout Time", text="Logout")
+        self.tree.heading("Time Consumed", text="Time Consumed(minutes)")
+
+        # Define column widths
+        self.tree.column("Date", width=100)
+        self.tree.column("Login Time", width=100)
+        self.tree.column("Logout Time", width=100)
+        self.tree.column("Time Consumed", width=100)
+
+        self.status = tk.Label(self.window, text="", anchor='w')
+        self.status.pack(fill='x')
+
+        self.fetch()
+
+    def fetch(self, cursor=None):
+        self.loading = True
+        self.status.config(text="Loading...")
+        future = self.app.worker.submit(self.app.backend.history, self.student_id, cursor)
+        self.wait(future)
+
+    def wait(self, future):
+        # Tk isn't thread-safe, so poll for the result from the main loop
+        if not self.window.winfo_exists():
+            return
+        if not future.done():
+            self.app.root.after(50, self.wait, future)
+            return
 
-# Django setup test code - ADD THIS HERE
-# try:
-#     print(f"Django Version: {django.get_version()}")
-#     print(f"Settings module: {os.environ['DJANGO_SETTINGS_MODULE']}")
-#     print(f"Database name: {settings.DATABASES['default']['NAME']}")
-#     print("Django configured successfully!")
-# except Exception as e:
-#     print(f"Django configuration error: {e}")
-#     sys.exit(1)
+        try:
+            rows, next_cursor = future.result()
+        except Exception as e:
+            self.loading = False
+            self.status.config(text=f"Could not load history: {e}")
+            return
+
+        for row in rows:
+            self.tree.insert("", "end", values=row)
+        self.next_cursor = next_cursor
+        self.loading = False
+
+        count = len(self.tree.get_children())
+        if count == 0:
+            self.status.config(text="No sessions this semester")
+        elif self.next_cursor:
+            self.status.config(text=f"{count} sessions, scroll for more")
+        else:
+            self.status.config(text=f"{count} sessions this semester")
+
+        # A page that doesn't fill the window can't be scrolled to load more
+        self.tree.update_idletasks()
+        if self.next_cursor and not self.loading and self.tree.yview()[1] >= 1.0:
+            self.fetch(self.next_cursor)
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9 and self.next_cursor and not self.loading:
+            self.fetch(self.next_cursor)
 
-# Now you can safely import Django models and utilities
-from students.models import Student, Session  # Adjust import based on your actual model names
 
 class StudentApp:
-    def __init__(self, root):
+    def __init__(self, root, backend=None, journal=None):
         self.root = root
+        self._backend = backend
+        self.journal = journal or SessionJournal(JOURNAL_PATH, send=lambda events: self.backend.sync_events(events))
+        self.journal.start()
+        # Backend calls that shouldn't block the main loop (history pages)
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kiosk-io')
         self.root.title("Student Login System")
         
         # Fullscreen for login
@@ -46,14 +274,29 @@ class StudentApp:
         self.logged_in_student = None
         self.login_time = None
         self.elapsed_time = timedelta(0)
+
+        # Both screens are built once and then only shown or hidden
+        self.login_container = None
+        self.menu_container = None
+        self.timer_job = None
         
         
         # Create login screen
         self.create_login_screen()
+        # Set up the backend (Django in ORM mode) once the screen is drawn
+        self.root.after_idle(lambda: self.backend)
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = make_backend()
+        return self._backend
 
         
     def create_login_screen(self):
-        self.clear_screen()
+        self.close_popups()
+        if self.menu_container is not None:
+            self.menu_container.grid_remove()
         
         self.root.deiconify()
         self.root.focus_force()
@@ -63,21 +306,25 @@ class StudentApp:
         
          #Disable closing application
         # self.root.protocol("WM_DELETE_WINDOW", lambda: messagebox.showinfo("Information", "Request denied"))
-        container = tk.Frame(self.root)
-        container.place(relx=0.5, rely=0.5, anchor='center')
+        if self.login_container is None:
+            self.build_login_screen()
+        else:
+            self.entry1.delete(0, tk.END)
+            self.entry2.delete(0, tk.END)
+        self.login_container.place(relx=0.5, rely=0.5, anchor='center')
+        self.entry1.focus_set()
+
+    def build_login_screen(self):
+        self.login_container = tk.Frame(self.root)
         
-        login_frame = tk.Frame(container)
+        login_frame = tk.Frame(self.login_container)
         login_frame.grid(row=0, column=0)
 
-        # Load and display the image
-        image_path = r"backend/gui_app/gui_logo.png"
-        if os.path.exists(image_path):
-            img = Image.open(image_path)
-            img.thumbnail((100, 100))
-            image = ImageTk.PhotoImage(img)
+        # Display the logo
+        image = load_logo()
+        if image is not None:
             image_label = tk.Label(login_frame, image=image)
             image_label.grid(row=0, column=0, padx=10, pady=10, sticky='w')  # Place the image label in the leftmost column and spanning 4 rows
-            image_label.image = image  # Keep a reference to avoid garbage collection
 
          # Add additional text
         self.additional_text = tk.Label(login_frame, text="LIC CONNECT", fg="maroon", font=("Helvetica", 25, "bold"), justify='center')
@@ -165,12 +412,8 @@ class StudentApp:
             return
 
         try:
-            # get student ID
-            student = Student.objects.get(studentID=student_id)
             # Update the password
-            from django.contrib.auth.hashers import make_password
-            student.password = make_password(new_password)
-            student.save()
+            self.backend.change_password(student_id, new_password)
 
             messagebox.showinfo("Success", "Password changed successfully!")
             # Destroy the pop-up window
@@ -183,7 +426,7 @@ class StudentApp:
             messagebox.showerror("Error", f"An error occurred: {e}")
 
     def create_menu_screen(self):
-        self.clear_screen()
+        self.login_container.place_forget()
 
         self.root.attributes('-fullscreen', False)
         self.root.geometry('250x200')
@@ -191,15 +434,21 @@ class StudentApp:
         
         self.elapsed_time = timedelta(0)
         self.login_time = datetime.now()
-        
+
+        if self.menu_container is None:
+            self.build_menu_screen()
+        self.menu_container.grid(row=0, column=0, sticky='nsew')
+
+        self.start_timer()
+
+    def build_menu_screen(self):
         # Create a container frame
-        container = tk.Frame(self.root)
-        container.grid(row=0, column=0, sticky='nsew')
-        container.grid_rowconfigure(0, weight=1)
-        container.grid_columnconfigure(0, weight=1)
+        self.menu_container = tk.Frame(self.root)
+        self.menu_container.grid_rowconfigure(0, weight=1)
+        self.menu_container.grid_columnconfigure(0, weight=1)
 
         # Create the menu frame
-        menu_frame = tk.Frame(container)
+        menu_frame = tk.Frame(self.menu_container)
         menu_frame.grid(row=0, column=0, padx=10, pady=10)
 
         # Timer label centered
@@ -221,90 +470,38 @@ class StudentApp:
         # Configure button frame to expand
         button_frame.grid_columnconfigure(0, weight=1)  # Allow Check History button to expand
         button_frame.grid_columnconfigure(1, weight=1)  # Allow Logout button to expand
-        
-        
-        
-        self.update_timer()
 
-    def clear_screen(self):
+    def close_popups(self):
+        # History and password windows must not outlive the student's session
         for widget in self.root.winfo_children():
-            widget.destroy()
-        
-    def debug_password_verification(self):
-        student_id = self.entry1.get()
-        password = self.entry2.get()
-        
-        
-        try:
-
-            student = Student.objects.get(studentID=student_id)
-            stored_password = student.password
-
-            # print(f"Debugging password verification:")
-            # print(f"1. Entered password: {password}")
-            # print(f"2. Stored hashed password: {stored_password}")
-
-           
-            from django.contrib.auth.hashers import check_password
-            is_valid = check_password(password, stored_password)
+            if isinstance(widget, tk.Toplevel):
+                widget.destroy()
         
-            
-            return is_valid
-        except Student.DoesNotExist:
-            # print(f"No student found with ID: {student_id}")
-            return False
-        except Exception as e:
-            # print(f"Error during password verification: {e}")
-            return False
-
     def login(self):
         student_id = self.entry1.get()
         password = self.entry2.get()
 
         try:
-            student = Student.objects.get(studentID=student_id)
-            is_valid = self.debug_password_verification()
+            # Update is_logged_in to True and open the session
+            login_time = datetime.now()
+            time_left = self.backend.login(student_id, password, login_time)
 
-            if not is_valid:
-                messagebox.showerror("Error", "Invalid StudentID or Password")
-                return
-            
-            # Check if the user is already logged in
-            if student.is_logged_in:
-                messagebox.showinfo("Info", "This student is already logged in.")
-                return
-
-            # Check for default password and force change
-            if password == '123456':
-                self.create_change_password_screen(student_id)
-                return
-
-            # Check if student has time left
-            if student.time_left == 0:
-                messagebox.showerror("Error", "No time left. Login not allowed.")
-                return
-
-            # Update is_logged_in to True
-            student.is_logged_in = True
-            student.save()
-
-            self.logged_in_student = student
-            self.time_left = timedelta(minutes=student.time_left)
-            self.login_time = datetime.now()
-
-            Session.objects.create(
-                date=self.login_time.date(),
-                loginTime=self.login_time.time(),
-                parent=student,
-                course=student.course
-            )
+            self.journal.record('login', student_id)
+            self.logged_in_student = student_id
+            self.time_left = timedelta(minutes=time_left)
+            self.login_time = login_time
+            self.login_clock = time.monotonic()
 
             
             self.create_menu_screen()
-            self.start_timer()
 
-        except Student.DoesNotExist:
-            messagebox.showerror("Error", "Invalid StudentID or Password")
+        except LoginRefused as e:
+            if e.change_password:
+                self.create_change_password_screen(student_id)
+            elif e.info:
+                messagebox.showinfo("Info", e.message)
+            else:
+                messagebox.showerror("Error", e.message)
         except Exception as e:
             # print(f"Login error: {e}")
             messagebox.showerror("Error", f"An error occurred during login: {e}")
@@ -314,27 +511,15 @@ class StudentApp:
     def logout(self):
         if self.logged_in_student:
             if self.login_time:  # Ensure login_time is not None
-                logout_time = datetime.now()
-                time_logged_in = (logout_time - self.login_time).total_seconds() // 60
-
-                # Update session using Django model
-                session = Session.objects.filter(
-                    parent=self.logged_in_student,
-                    logoutTime__isnull=True
-                ).latest('loginTime')
-                
-                session.logoutTime = logout_time
-                session.consumedTime = time_logged_in
-                session.save()
+                # Measured on the monotonic clock so a wall-clock change on
+                # the PC can't over- or under-charge the student
+                time_logged_in = int((time.monotonic() - self.login_clock) // 60)
 
-                # Update student's time left
-                self.logged_in_student.time_left -= time_logged_in
-                self.logged_in_student.save()
-
-                # Set is_logged_in to False
-                self.logged_in_student.is_logged_in = False
-                self.logged_in_student.save()
+                # Journaled locally; the sync thread closes the session on the
+                # server, so logout works even while the server is unreachable
+                self.journal.record('logout', self.logged_in_student, time_logged_in)
 
+                self.stop_timer()
                 self.logged_in_student = None
                 self.login_time = None
                 self.elapsed_time = timedelta(0)
@@ -350,59 +535,20 @@ class StudentApp:
 
     def check_history(self):
         if self.logged_in_student:
-            try:
-                # Use Django ORM to retrieve sessions for the logged-in student
-                sessions = Session.objects.filter(parent=self.logged_in_student)
-
-                if sessions.exists():
-                    # Create a new window to display session history
-                    history_window = tk.Toplevel(self.root)
-                    history_window.title("Session History")
-                    history_window.geometry("500x300")
-
-                    # Create a Treeview widget to display the history in tabular form
-                    tree = ttk.Treeview(history_window, columns=("Date", "Login Time", "Logout Time", "Time Consumed"), show="headings", height=10)
-                    tree.pack(expand=True, fill='both')
-
-                    # Define column headings
-                    tree.heading("Date", text="Date")
-                    tree.heading("Login Time", text="Login")
-                    tree.heading("Logout Time", text="Logout")
-                    tree.heading("Time Consumed", text="Time Consumed(minutes)")
-
-                    # Define column widths
-                    tree.column("Date", width=100)
-                    tree.column("Login Time", width=100)
-                    tree.column("Logout Time", width=100)
-                    tree.column("Time Consumed", width=100)
-
-                    # Iterate through sessions and insert into the Treeview
-                    for session in sessions:
-                        date = session.date
-                        # Format loginTime and logoutTime to display only HH:MM:SS
-                        logintime = session.loginTime.strftime("%H:%M:%S")
-
-                        if session.logoutTime:
-                            logouttime = session.logoutTime.strftime("%H:%M:%S")
-                        else:
-                            logouttime = 'Still logged in'
-
-                        # Time consumed (assuming it is in minutes)
-                        timeconsumed = session.consumedTime
-
-                        # Insert session details as a new row in the tree
-                        tree.insert("", "end", values=(date, logintime, logouttime, timeconsumed))
-                else:
-                    messagebox.showerror("Error", "No session history found for this student")
-            except Exception as e:
-                messagebox.showerror("Error", f"An error occurred: {e}")
+            HistoryWindow(self, self.logged_in_student)
         else:
             messagebox.showerror("Error", "No student is logged in")
 
 
     def start_timer(self):
+        self.stop_timer()
         self.update_timer()
 
+    def stop_timer(self):
+        if self.timer_job is not None:
+            self.root.after_cancel(self.timer_job)
+            self.timer_job = None
+
     def update_timer(self):
         # Check if the user is logged in and login_time is set
         if self.logged_in_student and self.login_time:
@@ -428,7 +574,7 @@ class StudentApp:
                 self.show_topmost_message("Warning", "Only 1 minute left!")
 
             # Update every second
-            self.root.after(1000, self.update_timer)
+            self.timer_job = self.root.after(1000, self.update_timer)
         else:
             # Handle the case where the user is not logged in
             self.timer_label.config(text="Time Left: 00:00:00")
@@ -450,6 +596,13 @@ class StudentApp:
         ok_button.pack(pady=5)
 
 def main():
+    # Checked before anything is drawn rather than on the first login
+    if not API_URL and not os.getenv('REDIS_URL'):
+        root = tk.Tk()
+        root.withdraw()
+        messagebox.showerror("Configuration error", "Set LIC_API_URL, or REDIS_URL to the server's Redis, before starting the kiosk.")
+        sys.exit(1)
+
     root = tk.Tk()
     app = StudentApp(root)
     root.mainloop()
@@ -0,0 +1,94 @@
+from datetime import date, datetime
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from . import presence
+from .models import Session, Student
+from .rollups import record_session_closed
+
+# Time accounting for kiosk login/logout and top-ups. Every change to a
+# student's balance or login state is a single conditional UPDATE with F()
+# expressions, so concurrent kiosks and the front desk never overwrite each
+# other's changes: a top-up during logout is kept, and of two kiosks logging
+# the same student in only one wins. Reads happen before the short
+# transaction that does the writes.
+
+
+def start_session(student, login_time=None, kiosk=''):
+    """Mark the student logged in and open a Session. Returns the session, or
+    None if the student was already logged in or out of time by the time the
+    UPDATE ran.
+
+    login_time is when the student logged in, on this machine's local clock
+    (default now)."""
+    now = timezone.now()
+    # The same moment on the server's clock, for replayed kiosk events
+    login_at = now - (datetime.now() - login_time) if login_time else now
+    with transaction.atomic():
+        claimed = Student.objects.filter(pk=student.pk, is_logged_in=False, time_left__gt=0).update(
+            is_logged_in=True, updated_at=now,
+        )
+        if not claimed:
+            return None
+        session = Session.objects.create(
+            login_at=login_at,
+            parent_id=student.studentID,
+            course=student.course,
+            kiosk=kiosk or '',
+        )
+        if login_time:
+            # date and loginTime are auto_now_add, which overwrites them on insert
+            session.date, session.loginTime = login_time.date(), login_time.time()
+            Session.objects.filter(pk=session.pk).update(date=session.date, loginTime=session.loginTime)
+        presence.mark_online(student.studentID, student.course, session.kiosk)
+    return session
+
+
+def minutes_between(login_time, logout_time):
+    consumed = logout_time - datetime.combine(date.today(), login_time)
+    return (consumed.seconds // 3600) * 60 + (consumed.seconds % 3600) // 60
+
+
+def close_session(student_id, logout_time=None, consumed_minutes=None):
+    """Close the student's open session, charge the minutes used and mark them
+    logged out. consumed_minutes defaults to the time since the session's
+    loginTime. Returns the closed session, or None if there was no open
+    session (or another request closed it first)."""
+    session = Session.objects.filter(parent_id=student_id, logoutTime__isnull=True).order_by('-id').first()
+    if session is None:
+        return None
+
+    logout_time = logout_time or datetime.now()
+    if consumed_minutes is None:
+        consumed_minutes = minutes_between(session.loginTime, logout_time)
+    consumed_minutes = int(consumed_minutes)
+
+    with transaction.atomic():
+        closed = Session.objects.filter(pk=session.pk, logoutTime__isnull=True).update(
+            logoutTime=logout_time.time(), consumedTime=consumed_minutes,
+        )
+        if not closed:
+            return None
+
+        Student.objects.filter(studentID=student_id).update(
+            is_logged_in=False,
+            # Not Greatest(time_left - n, 0): time_left is unsigned on MySQL,
+            # so the subtraction itself fails when the student is overdrawn
+            time_left=Case(When(time_left__gt=consumed_minutes, then=F('time_left') - consumed_minutes), default=Value(0)),
+            updated_at=timezone.now(),
+        )
+
+        session.logoutTime = logout_time.time()
+        session.consumedTime = consumed_minutes
+        record_session_closed(session)
+        presence.mark_offline(student_id)
+    return session
+
+
+def credit_minutes(student, minutes):
+    """Add minutes to a student's balance without reading it first."""
+    Student.objects.filter(pk=student.pk).update(
+        time_left=F('time_left') + minutes, updated_at=timezone.now(),
+    )
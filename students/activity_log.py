@@ -0,0 +1,125 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import ActivityLog, StaffActivityLog
+
+# Staff actions are logged on nearly every request, and a single-row INSERT
+# per entry adds a database round trip to the action itself. Entries are
+# collected in the worker instead and written with bulk_create by a
+# background thread once ACTIVITY_LOG_BATCH_SIZE have piled up or every
+# ACTIVITY_LOG_FLUSH_INTERVAL seconds, and once more when the worker exits.
+# Entries still in the buffer are lost if the worker is killed outright
+# (SIGKILL, OOM); ACTIVITY_LOG_BUFFERED = False writes each one immediately.
+# A batch the database refuses (outage, failover) goes back to the front of
+# the buffer and is retried on the next tick. While the database stays down
+# the buffer holds at most ACTIVITY_LOG_MAX_BUFFERED entries, dropping the
+# oldest, so a worker can't run out of memory waiting for it.
+
+logger = logging.getLogger(__name__)
+
+
+class LogBuffer:
+    def __init__(self, batch_size=100, interval=2.0, max_buffered=10000):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_buffered = max_buffered
+        self._entries = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+            self._trim()
+            full = len(self._entries) >= self.batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='activity-log', daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of entries."""
+        with self._lock:
+            entries, self._entries = self._entries, []
+        by_model = {}
+        for entry in entries:
+            by_model.setdefault(type(entry), []).append(entry)
+        written = set()
+        try:
+            for model, rows in by_model.items():
+                model.objects.bulk_create(rows, batch_size=500)
+                written.add(model)
+        except Exception:
+            self._requeue([entry for entry in entries if type(entry) not in written])
+            raise
+        return len(entries)
+
+    def _requeue(self, entries):
+        for entry in entries:
+            # bulk_create may have set ids before its transaction rolled back
+            entry.pk = None
+        with self._lock:
+            # Ahead of anything added meanwhile, so entries stay in order
+            self._entries = entries + self._entries
+            self._trim()
+
+    def _trim(self):
+        overflow = len(self._entries) - self.max_buffered
+        if overflow > 0:
+            del self._entries[:overflow]
+            logger.warning("Activity log buffer is full; dropped the %d oldest entries", overflow)
+
+    def stop(self):
+        """Stop the background thread and write what is left."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Writing buffered activity logs failed")
+            finally:
+                # The thread sleeps between batches; don't hold a connection
+                connection.close()
+
+
+_buffer = LogBuffer(
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 2.0),
+    max_buffered=getattr(settings, 'ACTIVITY_LOG_MAX_BUFFERED', 10000),
+)
+atexit.register(_buffer.stop)
+
+
+def write(entry):
+    if getattr(settings, 'ACTIVITY_LOG_BUFFERED', True):
+        _buffer.add(entry)
+    else:
+        entry.save()
+
+
+def log_action(username, action):
+    write(ActivityLog(username=username, action=action, timestamp=timezone.now()))
+
+
+def log_staff_action(staff, action):
+    write(StaffActivityLog(staff=staff, action=action, timestamp=timezone.now()))
+
+
+def flush():
+    return _buffer.flush()
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.db.models import Sum
+
+from .models import MonthlyUsageRollup, Session
+
+
+def month_name(month):
+    return datetime(2023, month, 1).strftime('%B')
+
+
+def session_hours_by_month(year, semester_name):
+    rows = (
+        MonthlyUsageRollup.objects
+        .filter(year=year, semester_name=semester_name, session_count__gt=0)
+        .values('month')
+        .annotate(total_minutes=Sum('minutes_used'))
+        .order_by('month')
+    )
+    return [{"month": month_name(row['month']), "total_hours": row['total_minutes'] / 60} for row in rows]
+
+
+def income_by_month(year, semester_name):
+    rows = (
+        MonthlyUsageRollup.objects
+        .filter(year=year, semester_name=semester_name, income__gt=0)
+        .values('month')
+        .annotate(total_income=Sum('income'))
+        .order_by('month')
+    )
+    return [{"month": month_name(row['month']), "total_income": row['total_income']} for row in rows]
+
+
+def count_active_users(year, semester_name):
+    # Students with at least one session this semester
+    return Session.objects.filter(year=year, semester_name=semester_name).values('parent_id').distinct().count()
+
+
+def course_counts_by_month(year, semester_name):
+    """Sessions per course per month for one semester, as
+    {course: [{"month": "August", "count": 12}, ...]}.
+
+    Runs a single GROUP BY course, month query and pivots it here, so the
+    cost does not grow with the number of courses."""
+    rows = (
+        MonthlyUsageRollup.objects
+        .filter(year=year, semester_name=semester_name)
+        .values('course', 'month')
+        .annotate(count=Sum('session_count'))
+        .filter(count__gt=0)
+        .order_by('course', 'month')
+    )
+
+    data = {}
+    for row in rows:
+        data.setdefault(row['course'], []).append({
+            "month": month_name(row['month']),
+            "count": row['count'],
+        })
+    return data
@@ -0,0 +1,135 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from django.db import connection
+
+from .models import Student, Session, Transaction, Semester
+from .semester import invalidate_current_semester
+
+# Helpers shared by the bench_* management commands. Everything here runs
+# against a throwaway copy of the database (the same one `manage.py test`
+# uses), never against real data.
+
+SEMESTER_NAMES = ['firstsem', 'secondsem', 'midyear']
+
+
+@contextmanager
+def throwaway_database(verbosity=0):
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity)
+
+
+@contextmanager
+def explicit_auto_now(*fields):
+    # bulk_create honours auto_now_add, which would stamp every seeded row
+    # with today's date; switch it off so the seed can spread rows over time.
+    previous = [(field, field.auto_now_add) for field in fields]
+    for field, _ in previous:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in previous:
+            field.auto_now_add = value
+
+
+def best_of(func, repeat=5):
+    """Run func `repeat` times and return the fastest wall time in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def semesters(count):
+    """The `count` most recent (year, semester_name) pairs, oldest first."""
+    pairs = []
+    year = 2024
+    while len(pairs) < count:
+        for name in SEMESTER_NAMES:
+            pairs.append((str(year), name))
+        year -= 1
+    return list(reversed(pairs[:count]))
+
+
+def seed_students(count, password='x'):
+    courses = [f'COURSE{i:02d}' for i in range(40)]
+    students = [
+        Student(
+            studentID=f'{(i // 10000000) % 100:02d}-{(i // 1000) % 10000:04d}-{i % 1000:03d}',
+            name=f'Student {i}',
+            course=courses[i % len(courses)],
+            time_left=600,
+            password=password,
+        )
+        for i in range(count)
+    ]
+    Student.objects.bulk_create(students, batch_size=5000)
+    return list(Student.objects.values_list('studentID', 'course'))
+
+
+def seed_sessions(count, students, semester_count=12, open_sessions=0, batch_size=10000, rng=None):
+    """Bulk insert `count` closed sessions spread evenly over the last
+    `semester_count` semesters, plus `open_sessions` still-open ones in the
+    most recent semester. Returns the most recent (year, semester_name)."""
+    rng = rng or random.Random(0)
+    terms = semesters(semester_count)
+    login = datetime(2024, 1, 1, 8, 0).time()
+    logout = datetime(2024, 1, 1, 9, 0).time()
+
+    with explicit_auto_now(Session._meta.get_field('date'), Session._meta.get_field('loginTime')):
+        batch = []
+        for i in range(count + open_sessions):
+            is_open = i >= count
+            term_index = len(terms) - 1 if is_open else i * len(terms) // count
+            year, semester_name = terms[term_index]
+            student_id, course = students[rng.randrange(len(students))]
+            batch.append(Session(
+                parent_id=student_id,
+                course=course,
+                date=date(2000 + term_index // 3, 1 + (term_index % 3) * 4, 1) + timedelta(days=rng.randrange(110)),
+                loginTime=login,
+                logoutTime=None if is_open else logout,
+                consumedTime=None if is_open else 60,
+                year=year,
+                semester_name=semester_name,
+            ))
+            if len(batch) >= batch_size:
+                Session.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Session.objects.bulk_create(batch)
+
+    year, semester_name = terms[-1]
+    Semester.objects.update_or_create(pk=1, defaults={'year': year, 'semester_name': semester_name})
+    invalidate_current_semester()
+    return year, semester_name
+
+
+def seed_transactions(count, semester_count=12, batch_size=10000, rng=None):
+    rng = rng or random.Random(0)
+    terms = semesters(semester_count)
+    student_pks = list(Student.objects.values_list('pk', flat=True))
+    batch = []
+    for i in range(count):
+        year, semester_name = terms[i * len(terms) // count]
+        batch.append(Transaction(
+            student_id=student_pks[rng.randrange(len(student_pks))],
+            reference_number=f'REF{i:09d}',
+            amount=15 * rng.randint(1, 5),
+            year=year,
+            semester_name=semester_name,
+        ))
+        if len(batch) >= batch_size:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Transaction.objects.bulk_create(batch)
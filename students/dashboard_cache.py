@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .locks import LockTimeout, cache_lock
+from .models import DashboardVersion, MonthlyUsageRollup, Semester
+from .semester import get_current_semester
+
+# Cached dashboard figures (session hours, income, course counts, active
+# users). Each entry is keyed on the endpoint, the semester and that
+# semester's data version, which rollups.py bumps once a logout or payment for
+# the semester commits. A change therefore just moves readers to a new key,
+# and nothing has to be deleted. The versions are DashboardVersion rows rather
+# than cache keys: the file-based cache culls entries at random, and a counter
+# that restarted would serve an old entry stored under the same version.
+# Current-semester entries expire after CURRENT_TIMEOUT so superseded
+# versions don't pile up; past semesters hardly ever change and are kept for
+# PAST_TIMEOUT. Only semesters that exist (the current one, or one with
+# rollup data) are cached, so arbitrary query parameters can't fill the cache.
+#
+# Concurrent misses on the same key compute it once: the first caller takes a
+# cache lock (locks.py) and the others wait for it and read its result.
+
+CURRENT_TIMEOUT = 60 * 60
+PAST_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def data_version(year, semester_name):
+    versions = DashboardVersion.objects.filter(year=year, semester_name=semester_name).values_list('version', flat=True)[:1]
+    return versions[0] if versions else 0
+
+
+def bump_data_version(year, semester_name):
+    """Move the semester's dashboards to a new version once the current
+    transaction commits (immediately outside one)."""
+    def bump():
+        versions = DashboardVersion.objects.filter(year=year, semester_name=semester_name)
+        if versions.update(version=F('version') + 1):
+            return
+        try:
+            # First bump for this semester; a concurrent first bump wins the
+            # unique key and this one falls back to the UPDATE
+            with transaction.atomic():
+                DashboardVersion.objects.create(year=year, semester_name=semester_name, version=1)
+        except IntegrityError:
+            versions.update(version=F('version') + 1)
+    transaction.on_commit(bump)
+
+
+def known_semester(year, semester_name):
+    return (
+        Semester.objects.filter(year=year, semester_name=semester_name).exists()
+        or MonthlyUsageRollup.objects.filter(year=year, semester_name=semester_name).exists()
+    )
+
+
+def cached(name, year, semester_name, compute):
+    """compute()'s result for this endpoint and semester, from the cache when
+    the semester's data hasn't changed since it was stored."""
+    key = f'dashboard:{name}:{year}:{semester_name}:{data_version(year, semester_name)}'
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    current = get_current_semester()
+    is_current = current is not None and (current.year, current.semester_name) == (year, semester_name)
+    if not is_current and not known_semester(year, semester_name):
+        return compute()
+    timeout = CURRENT_TIMEOUT if is_current else PAST_TIMEOUT
+
+    try:
+        with cache_lock(key):
+            value = cache.get(key)
+            if value is None:
+                value = compute()
+                cache.set(key, value, timeout)
+    except LockTimeout:
+        # The first caller is stuck; answer without the cache
+        value = compute()
+    return value
@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Max
+
+from .exports import export_filename, write_semester_workbook
+from .models import Session, Transaction
+
+# Background semester exports. Finished workbooks are kept on disk under
+# EXPORT_CACHE_DIR, named after the semester and a watermark of its data, so a
+# request for a semester whose rows have not changed is answered with the file
+# that is already there. Job status lives in the shared cache so any gunicorn
+# worker can report on a job another worker is running.
+#
+# Jobs run on a thread of the worker that started them. Every status update
+# stamps the job with a heartbeat (progress comes every CHUNK_SIZE rows), and
+# a queued or running job whose heartbeat is older than STALE_AFTER is
+# reported as failed: its worker was restarted or killed, and a new request
+# for the semester starts over instead of waiting for JOB_TIMEOUT.
+#
+# The workbooks themselves are plain files, so every web worker must see the
+# same EXPORT_CACHE_DIR: run on a single host, or point DJANGO_EXPORT_DIR at a
+# shared volume. Otherwise a finished job can 404 on a worker of another host.
+
+logger = logging.getLogger(__name__)
+
+JOB_TIMEOUT = 24 * 60 * 60
+STALE_AFTER = 10 * 60
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'EXPORT_WORKERS', 1), thread_name_prefix='export')
+    return _executor
+
+
+def export_dir():
+    path = getattr(settings, 'EXPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'lic_connect_exports'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def semester_watermark(year, semester_name):
+    """Return (watermark, total_rows) for a semester's export data.
+
+    The watermark changes whenever a session or transaction is added or
+    removed, or a session is closed (closing updates a row in place, so the
+    closed-session count is part of it)."""
+    sessions = Session.objects.filter(year=year, semester_name=semester_name).aggregate(
+        max_id=Max('id'), rows=Count('id'), closed=Count('logoutTime'), last_date=Max('date'),
+    )
+    payments = Transaction.objects.filter(year=year, semester_name=semester_name).aggregate(
+        max_id=Max('id'), rows=Count('id'), last_timestamp=Max('timestamp'),
+    )
+    raw = '|'.join(str(value) for value in [*sessions.values(), *payments.values()])
+    return hashlib.sha1(raw.encode()).hexdigest()[:16], sessions['rows'] + payments['rows']
+
+
+def artifact_path(year, semester_name, watermark):
+    name = export_filename(year, semester_name).replace('.xlsx', f'_{watermark}.xlsx')
+    return os.path.join(export_dir(), name)
+
+
+def build_artifact(year, semester_name, watermark, progress=None):
+    """Write the workbook for this watermark unless it already exists and
+    return its path. Files are written under a temporary name and renamed
+    into place, so readers never see a partial workbook."""
+    path = artifact_path(year, semester_name, watermark)
+    if os.path.exists(path):
+        return path
+
+    partial = f'{path}.{uuid.uuid4().hex}.partial'
+    try:
+        with open(partial, 'wb') as fileobj:
+            write_semester_workbook(fileobj, year, semester_name, progress=progress)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    _remove_stale_artifacts(year, semester_name, keep=path)
+    return path
+
+
+def _remove_stale_artifacts(year, semester_name, keep):
+    prefix = export_filename(year, semester_name).replace('.xlsx', '_')
+    directory = export_dir()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(prefix) and name.endswith('.xlsx') and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _job_key(job_id):
+    return f'export_job:{job_id}'
+
+
+def _active_key(year, semester_name, watermark):
+    return f'export_job:active:{year}:{semester_name}:{watermark}'
+
+
+def get_job(job_id):
+    job = cache.get(_job_key(job_id))
+    if job is not None and job['status'] in (QUEUED, RUNNING) and time.time() - job['heartbeat'] > STALE_AFTER:
+        job.update(status=FAILED, error="The export stopped responding; start it again")
+    return job
+
+
+def _save_job(job):
+    job['heartbeat'] = time.time()
+    cache.set(_job_key(job['id']), job, timeout=JOB_TIMEOUT)
+
+
+def _update_job(job_id, **changes):
+    # Read the stored job, not get_job()'s view: a job that was only slow
+    # goes back to its real status with its next heartbeat
+    job = cache.get(_job_key(job_id))
+    if job is not None:
+        job.update(changes)
+        _save_job(job)
+    return job
+
+
+def start_export(year, semester_name):
+    """Start (or reuse) an export job for a semester and return its status."""
+    watermark, total_rows = semester_watermark(year, semester_name)
+    job = {
+        'id': uuid.uuid4().hex,
+        'year': year,
+        'semester_name': semester_name,
+        'watermark': watermark,
+        'status': QUEUED,
+        'rows_written': 0,
+        'total_rows': total_rows,
+        'filename': export_filename(year, semester_name),
+        'error': None,
+    }
+
+    if os.path.exists(artifact_path(year, semester_name, watermark)):
+        job.update(status=DONE, rows_written=total_rows)
+        _save_job(job)
+        return job
+
+    # Only one job per semester and watermark; repeated clicks join it
+    if not cache.add(_active_key(year, semester_name, watermark), job['id'], timeout=JOB_TIMEOUT):
+        existing = get_job(cache.get(_active_key(year, semester_name, watermark)))
+        if existing is not None and existing['status'] in (QUEUED, RUNNING, DONE):
+            return existing
+        cache.set(_active_key(year, semester_name, watermark), job['id'], timeout=JOB_TIMEOUT)
+
+    _save_job(job)
+    _get_executor().submit(_run_job, job['id'])
+    return job
+
+
+def _run_job(job_id):
+    job = _update_job(job_id, status=RUNNING)
+    try:
+        build_artifact(
+            job['year'], job['semester_name'], job['watermark'],
+            progress=lambda rows: _update_job(job_id, rows_written=rows),
+        )
+        _update_job(job_id, status=DONE)
+    except Exception as e:
+        logger.exception(f"Export job {job_id} failed")
+        _update_job(job_id, status=FAILED, error=str(e))
+        cache.delete(_active_key(job['year'], job['semester_name'], job['watermark']))
+    finally:
+        # Worker threads get their own connection; don't leak it
+        connection.close()
+
+
+def job_artifact(job):
+    """Path of a finished job's workbook, or None if it is not available."""
+    if job['status'] != DONE:
+        return None
+    path = artifact_path(job['year'], job['semester_name'], job['watermark'])
+    return path if os.path.exists(path) else None
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import openpyxl
+
+from .models import Session, Transaction
+
+# Semester export to XLSX. The workbook is built in openpyxl's write-only mode
+# from values_list() rows fetched CHUNK_SIZE at a time by id (keyset paging,
+# not .iterator(): mysqlclient has no server-side cursors and would buffer the
+# whole result), so neither model instances nor the sheet contents are ever
+# held in memory. Callers write it to a file (see export_jobs.py) and stream
+# that back.
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CHUNK_SIZE = 2000
+
+SESSION_HEADERS = ['Date', 'StudentID', 'Course', 'Login Time', 'Logout Time', 'Time Consumed (minutes)', 'Semester', 'School Year']
+SESSION_COLUMNS = ['date', 'parent_id', 'course', 'loginTime', 'logoutTime', 'consumedTime', 'semester_name', 'year']
+TRANSACTION_HEADERS = ['Reference Number', 'Date and Time', 'Payment(PHP)', 'Semester', 'School Year']
+TRANSACTION_COLUMNS = ['reference_number', 'timestamp', 'amount', 'semester_name', 'year']
+
+
+def make_naive(value):
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(tz=None).replace(tzinfo=None)
+    return value
+
+
+def export_filename(year, semester_name):
+    return f"{semester_name}_{year}_records.xlsx"
+
+
+def semester_rows(model, columns, year, semester_name):
+    rows = model.objects.filter(semester_name=semester_name, year=year).order_by('id')
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last_id).values_list('id', *columns)[:CHUNK_SIZE])
+        for row in chunk:
+            yield row[1:]
+        if len(chunk) < CHUNK_SIZE:
+            return
+        last_id = chunk[-1][0]
+
+
+def write_semester_workbook(fileobj, year, semester_name, progress=None):
+    """Write the Sessions and Transactions sheets for a semester to fileobj.
+
+    `progress`, if given, is called with the running row count every
+    CHUNK_SIZE rows."""
+    workbook = openpyxl.Workbook(write_only=True)
+    written = 0
+
+    sheet = workbook.create_sheet(title='Sessions')
+    sheet.append(SESSION_HEADERS)
+    for row in semester_rows(Session, SESSION_COLUMNS, year, semester_name):
+        sheet.append(row)
+        written += 1
+        if progress and written % CHUNK_SIZE == 0:
+            progress(written)
+
+    transaction_sheet = workbook.create_sheet(title='Transactions')
+    transaction_sheet.append(TRANSACTION_HEADERS)
+    for reference_number, timestamp, amount, sem, school_year in semester_rows(Transaction, TRANSACTION_COLUMNS, year, semester_name):
+        transaction_sheet.append([reference_number, make_naive(timestamp), amount, sem, school_year])
+        written += 1
+        if progress and written % CHUNK_SIZE == 0:
+            progress(written)
+
+    workbook.save(fileobj)
+    if progress:
+        progress(written)
+    return written
@@ -0,0 +1,32 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+# Query-parameter filters shared by the list endpoints.
+
+
+def parse_date_range(params):
+    """(start, end) dates from ?start=YYYY-MM-DD&end=YYYY-MM-DD, either of
+    which may be None. Raises ValueError for anything that isn't a date."""
+    dates = []
+    for name in ('start', 'end'):
+        value = params.get(name)
+        try:
+            parsed = parse_date(value) if value else None
+        except ValueError:
+            parsed = None
+        if value and parsed is None:
+            raise ValueError("start and end must be dates (YYYY-MM-DD)")
+        dates.append(parsed)
+    return tuple(dates)
+
+
+def filter_day_range(queryset, field, start=None, end=None):
+    """Limit a DateTimeField to whole days, start and end inclusive. Compares
+    against datetimes rather than __date so the column's index is usable."""
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': timezone.make_aware(datetime.combine(start, time.min))})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lt': timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))})
+    return queryset
@@ -0,0 +1,60 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.utils.module_loading import import_string
+
+# PBKDF2 is deliberately slow (hundreds of thousands of iterations per hash),
+# so hashing a whole intake's passwords on the request thread pins one core
+# for minutes. hash_passwords() spreads the work over a process pool sized to
+# the machine. Workers are spawned (not forked) and set Django up themselves,
+# which keeps them safe to start from a threaded gunicorn worker. Spawned
+# workers only see the settings module, not runtime PASSWORD_HASHERS
+# overrides, so batches carry the hasher's dotted path rather than its name.
+# The pool lives only for one hash_passwords() call: bulk imports and resets
+# are rare, and a pool kept per gunicorn worker would leave workers x CPUs
+# idle Django processes behind. Starting it costs about a second, next to
+# the minutes of hashing it saves.
+
+# Below this many passwords the pool's overhead isn't worth it
+MIN_PARALLEL = 8
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _hash_batch(passwords, hasher_path):
+    hasher = import_string(hasher_path)()
+    return [make_password(password, hasher=hasher) for password in passwords]
+
+
+def worker_count():
+    return getattr(settings, 'PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+
+
+def hash_passwords(passwords):
+    """Return make_password() of each password, in order, hashed in parallel
+    across a process pool started for this call."""
+    passwords = list(passwords)
+    hasher = type(get_hasher('default'))
+    hasher_path = f'{hasher.__module__}.{hasher.__qualname__}'
+    workers = worker_count()
+
+    if workers <= 1 or len(passwords) < MIN_PARALLEL:
+        return _hash_batch(passwords, hasher_path)
+
+    # A few batches per worker keeps every core busy until the end
+    size = math.ceil(len(passwords) / (workers * 4))
+    batches = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(batches)),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+    ) as pool:
+        results = list(pool.map(_hash_batch, batches, [hasher_path] * len(batches)))
+    return [hashed for batch in results for hashed in batch]
@@ -0,0 +1,75 @@
+import base64
+from datetime import date, time
+
+from django.db.models import Q
+
+from .filters import parse_date_range
+from .models import Session
+
+# A student's session history for the semester, for the kiosk history window
+# and the staff session list. Pages are newest first and keyset-paginated on
+# (date, loginTime, id): the cursor holds the last row's key, so a later page
+# costs the same index range scan as the first (session_parent_semester_idx)
+# instead of an OFFSET over everything before it.
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+FIELDS = ('id', 'date', 'loginTime', 'logoutTime', 'consumedTime')
+
+
+def encode_cursor(row):
+    key = f"{row['date'].isoformat()}|{row['loginTime'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        day, login_time, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return date.fromisoformat(day), time.fromisoformat(login_time), int(pk)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def parse_params(params):
+    """(start, end, cursor, page_size) from query or form parameters. Raises
+    ValueError with a message for the client on bad input."""
+    start, end = parse_date_range(params)
+
+    cursor = params.get('cursor') or None
+    if cursor:
+        decode_cursor(cursor)
+
+    try:
+        page_size = min(int(params.get('page_size', PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("page_size must be a number")
+    if page_size < 1:
+        raise ValueError("page_size must be positive")
+    return start, end, cursor, page_size
+
+
+def semester_sessions(student_id, semester, start=None, end=None):
+    sessions = Session.objects.filter(parent_id=student_id, year=semester.year, semester_name=semester.semester_name)
+    if start:
+        sessions = sessions.filter(date__gte=start)
+    if end:
+        sessions = sessions.filter(date__lte=end)
+    return sessions
+
+
+def history_page(sessions, cursor=None, page_size=PAGE_SIZE):
+    """One page of values() rows, newest first. Returns (rows, next_cursor,
+    total_minutes), where total_minutes sums the page's consumedTime and
+    next_cursor is None on the last page."""
+    if cursor:
+        day, login_time, pk = decode_cursor(cursor)
+        sessions = sessions.filter(
+            Q(date__lt=day)
+            | Q(date=day, loginTime__lt=login_time)
+            | Q(date=day, loginTime=login_time, id__lt=pk)
+        )
+    # One row past the page tells whether there is a next one
+    rows = list(sessions.order_by('-date', '-loginTime', '-id').values(*FIELDS)[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    rows = rows[:page_size]
+    return rows, next_cursor, sum(row['consumedTime'] or 0 for row in rows)
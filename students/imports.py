@@ -0,0 +1,71 @@
+from django.db import transaction
+
+from .hashing import hash_passwords
+from .models import Student
+from .serializers import StudentImportSerializer, StudentSerializer
+
+# Set-based student import: one studentID__in lookup and one chunked
+# bulk_create per IMPORT_CHUNK_SIZE rows, all inside a single transaction, so
+# an import either lands completely or not at all. Rows are validated and
+# their default passwords hashed (in parallel, by the hashing pool) before
+# the transaction opens, so it isn't held through the CPU-bound hashing.
+
+IMPORT_CHUNK_SIZE = 500
+DEFAULT_PASSWORD = '123456'
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def import_students(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import a list of student dicts.
+
+    Returns (inserted, duplicates, errors): serialized inserted students, the
+    raw rows whose studentID already exists (in the database or earlier in
+    the same list), and the validation errors of the first invalid row. When
+    errors is not None nothing was written."""
+    inserted = []
+    duplicates = []
+    candidates = []
+    seen = set()
+
+    for chunk in _chunks(rows, chunk_size):
+        ids = [row.get('studentID') for row in chunk]
+        existing = set(Student.objects.filter(studentID__in=[i for i in ids if i]).values_list('studentID', flat=True))
+
+        fresh = []
+        for row, student_id in zip(chunk, ids):
+            if student_id in existing or student_id in seen:
+                duplicates.append(row)
+            else:
+                seen.add(student_id)
+                fresh.append(row)
+
+        serializer = StudentImportSerializer(data=fresh, many=True)
+        if not serializer.is_valid():
+            # Newer DRF versions key list errors by row index
+            errors = serializer.errors
+            errors = errors.values() if isinstance(errors, dict) else errors
+            return [], duplicates, next(error for error in errors if error)
+        candidates.extend(zip(fresh, serializer.validated_data))
+
+    hashes = hash_passwords([DEFAULT_PASSWORD] * len(candidates))
+
+    with transaction.atomic():
+        for chunk in _chunks(list(zip(candidates, hashes)), chunk_size):
+            # Catch rows another import added since the check above
+            ids = [data['studentID'] for (_, data), _ in chunk]
+            existing = set(Student.objects.filter(studentID__in=ids).values_list('studentID', flat=True))
+
+            students = []
+            for (row, data), hashed in chunk:
+                if data['studentID'] in existing:
+                    duplicates.append(row)
+                else:
+                    students.append(Student(**{**data, 'password': hashed}))
+            Student.objects.bulk_create(students, batch_size=chunk_size)
+            inserted.extend(StudentSerializer(students, many=True).data)
+
+    return inserted, duplicates, None
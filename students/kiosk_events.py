@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .accounting import close_session
+from .models import KioskEvent, Session
+
+# Logins and logouts replayed from the kiosks' offline journals
+# (gui_app/journal.py). A kiosk keeps recording events while the server is
+# unreachable and sends them in batches once it is back. Every event carries
+# a UUID from the kiosk and KioskEvent.event_id is unique, so a batch resent
+# after a lost response changes nothing.
+#
+# Logins are still authenticated online, so the session already exists by the
+# time its login event arrives; that event is only recorded. Logouts close the
+# session at the time the student actually left.
+
+
+def event_time(event, now=None):
+    """When the event happened. The kiosk's monotonic age is preferred, so a
+    kiosk with a wrong wall clock still closes sessions at the right time;
+    events from before a kiosk reboot fall back to its wall-clock time."""
+    if event.get('age') is not None:
+        return (now or timezone.now()) - timedelta(seconds=event['age'])
+    return event['occurred_at']
+
+
+def close_from_event(student_id, occurred_at, consumed_minutes):
+    session = (
+        Session.objects.filter(parent_id=student_id, logoutTime__isnull=True)
+        .order_by('-id').values('date', 'loginTime', 'login_at').first()
+    )
+    if session is None:
+        return
+    login_time = datetime.combine(session['date'], session['loginTime'])
+
+    if session['login_at'] is not None:
+        # A late replay must not close a session the student opened afterwards
+        if session['login_at'] > occurred_at:
+            return
+        # loginTime is on the clock of the machine that opened the session
+        # (often a kiosk's local time), so the logout is written on that same
+        # clock rather than converted to the server's time zone
+        logout_time = login_time + (occurred_at - session['login_at'])
+    else:
+        # Sessions opened before login_at was recorded
+        logout_time = timezone.make_naive(occurred_at)
+        if login_time > logout_time:
+            return
+    close_session(student_id, logout_time, consumed_minutes=consumed_minutes)
+
+
+def apply_events(kiosk, events):
+    """Record and apply validated events (KioskEventSerializer) in order.
+    Returns the ids the kiosk can drop from its journal: the ones applied now
+    and the ones the server already had."""
+    now = timezone.now()
+    event_ids = [event['event_id'] for event in events]
+    known = set(KioskEvent.objects.filter(event_id__in=event_ids).values_list('event_id', flat=True))
+
+    with transaction.atomic():
+        for event in events:
+            if event['event_id'] in known:
+                continue
+            occurred_at = event_time(event, now)
+            try:
+                with transaction.atomic():
+                    KioskEvent.objects.create(
+                        event_id=event['event_id'],
+                        kiosk=kiosk,
+                        kind=event['kind'],
+                        studentID=event['studentID'],
+                        occurred_at=occurred_at,
+                        consumed_minutes=event.get('consumed_minutes'),
+                    )
+                    if event['kind'] == KioskEvent.LOGOUT:
+                        close_from_event(event['studentID'], occurred_at, event.get('consumed_minutes'))
+            except IntegrityError:
+                # Another request is applying the same batch
+                pass
+            known.add(event['event_id'])
+
+    return [str(event_id) for event_id in event_ids]
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class LockTimeout(Exception):
+    pass
+
+
+# Open lock files of the locks this process holds, by token
+_held = {}
+_held_lock = threading.Lock()
+
+
+def _lock_path(key):
+    # FileBasedCache.add() checks for the key and then writes it, so two
+    # callers can both "add" it. With that backend the lock is an flock() on a
+    # file in the cache directory instead, which is exclusive across threads
+    # and processes. The file stays in place; the kernel drops the lock when
+    # its holder closes it or dies, so a dead holder never has to be cleared
+    # away by hand. (The backend only culls its .djcache files.)
+    config = settings.CACHES['default']
+    if fcntl is None or not config['BACKEND'].endswith('FileBasedCache'):
+        return None
+    os.makedirs(config['LOCATION'], exist_ok=True)
+    return os.path.join(config['LOCATION'], hashlib.md5(key.encode()).hexdigest() + '.lock')
+
+
+def _acquire(key, token, timeout):
+    path = _lock_path(key)
+    if path is None:
+        return cache.add(key, token, timeout)
+
+    # Every attempt opens the file itself: flock() conflicts between separate
+    # opens even within one process
+    fd = os.open(path, os.O_CREAT | os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    with _held_lock:
+        _held[token] = fd
+    return True
+
+
+def _release(key, token):
+    path = _lock_path(key)
+    if path is None:
+        if cache.get(key) == token:
+            cache.delete(key)
+        return
+
+    with _held_lock:
+        fd = _held.pop(token, None)
+    if fd is not None:
+        os.close(fd)  # Releases the flock
+
+
+@contextmanager
+def cache_lock(name, timeout=30, wait=10):
+    """Hold a lock shared by every worker using the configured cache.
+
+    cache.add() only succeeds for the first caller, so it serves as the
+    acquire; the lock expires after `timeout` seconds in case its holder dies.
+    (On the file-based cache the lock is an flock(), released as soon as its
+    holder dies, and `timeout` is unused.)
+    Raises LockTimeout if the lock can't be taken within `wait` seconds."""
+    key = f'lock:{name}'
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+
+    while not _acquire(key, token, timeout):
+        if time.monotonic() > deadline:
+            raise LockTimeout(name)
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        _release(key, token)
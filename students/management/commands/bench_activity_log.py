@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from students import activity_log
+from students.benchmarking import throwaway_database
+from students.models import ActivityLog
+from students.views import log_activity
+
+
+class Command(BaseCommand):
+    help = "Time the activity-log endpoint with synchronous and buffered writes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--actions', type=int, default=2000)
+
+    def run(self, actions):
+        factory = APIRequestFactory()
+        latencies = []
+        for i in range(actions):
+            request = factory.post('/api/activity-logs/', {'username': 'staff', 'action': f'Action {i}'}, format='json')
+            start = time.perf_counter()
+            log_activity(request)
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        activity_log.flush()
+        drain = time.perf_counter() - start
+        latencies.sort()
+        return sum(latencies) / actions, latencies[int(actions * 0.95)], drain
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            for name, buffered in [('sync', False), ('buffered', True)]:
+                ActivityLog.objects.all().delete()
+                with override_settings(ACTIVITY_LOG_BUFFERED=buffered):
+                    mean, p95, drain = self.run(options['actions'])
+                # Let the background thread finish anything it picked up
+                time.sleep(activity_log._buffer.interval + 0.5)
+                rows = ActivityLog.objects.count()
+                self.stdout.write(
+                    f"{name:<9} mean {mean * 1000:6.3f} ms   p95 {p95 * 1000:6.3f} ms   "
+                    f"final flush {drain * 1000:6.1f} ms   rows {rows}"
+                )
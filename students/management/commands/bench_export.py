@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import resource
+import time
+
+import openpyxl
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from students.benchmarking import seed_sessions, seed_students, throwaway_database
+from students.exports import make_naive, write_semester_workbook
+from students.models import Session, Transaction
+
+
+def current_rss_kb():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def streaming_export(year, semester_name):
+    with open(os.devnull, 'wb') as sink:
+        write_semester_workbook(sink, year, semester_name)
+
+
+def in_memory_export(year, semester_name):
+    # The export as it was before exports.py: full model instances and a
+    # regular (in-memory) workbook.
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for record in Session.objects.filter(semester_name=semester_name, year=year):
+        sheet.append([record.date, record.parent_id, record.course, make_naive(record.loginTime), make_naive(record.logoutTime), record.consumedTime, record.semester_name, record.year])
+    transaction_sheet = workbook.create_sheet(title='Transactions')
+    for t in Transaction.objects.filter(semester_name=semester_name, year=year):
+        transaction_sheet.append([t.reference_number, make_naive(t.timestamp), t.amount, t.semester_name, t.year])
+    with open(os.devnull, 'wb') as sink:
+        workbook.save(sink)
+
+
+EXPORTS = {'streaming': streaming_export, 'in-memory': in_memory_export}
+
+
+def measure(name, year, semester_name, results):
+    # Runs in a forked child so each export's peak RSS is measured on its own
+    baseline = current_rss_kb()
+    start = time.perf_counter()
+    EXPORTS[name](year, semester_name)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((peak - baseline, elapsed))
+
+
+class Command(BaseCommand):
+    help = "Measure the peak RSS and wall time of the semester XLSX export at different session counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+        parser.add_argument('--students', type=int, default=20_000)
+        parser.add_argument('--mode', choices=['streaming', 'in-memory', 'both'], default='streaming',
+                            help="'in-memory' replays the previous export for comparison (slow and memory-hungry at 1M).")
+
+    def handle(self, *args, **options):
+        modes = ['streaming', 'in-memory'] if options['mode'] == 'both' else [options['mode']]
+        context = multiprocessing.get_context('fork')
+        report = []
+
+        with throwaway_database():
+            students = seed_students(options['students'])
+            for size in options['sizes']:
+                Session.objects.all().delete()
+                year, semester_name = seed_sessions(size, students, semester_count=1)
+                connections.close_all()
+
+                for mode in modes:
+                    results = context.Queue()
+                    child = context.Process(target=measure, args=(mode, year, semester_name, results))
+                    child.start()
+                    peak_kb, elapsed = results.get()
+                    child.join()
+                    report.append((size, mode, peak_kb, elapsed))
+                    self.stdout.write(f"{size:>10} sessions  {mode:<10}  peak RSS +{peak_kb / 1024:8.1f} MB  {elapsed:7.1f} s")
+
+        self.stdout.write("")
+        self.stdout.write(f"{'sessions':>10}  {'mode':<10}  {'peak RSS (MB)':>14}  {'time (s)':>9}")
+        for size, mode, peak_kb, elapsed in report:
+            self.stdout.write(f"{size:>10}  {mode:<10}  {peak_kb / 1024:>14.1f}  {elapsed:>9.1f}")
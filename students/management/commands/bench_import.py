@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from students.benchmarking import throwaway_database
+from students.imports import import_students
+from students.models import Student
+from students.serializers import StudentSerializer
+
+
+def per_row_import(rows):
+    # ImportStudentView's loop before imports.py, kept for comparison
+    inserted, duplicates = [], []
+    for row in rows:
+        if Student.objects.filter(studentID=row.get('studentID')).exists():
+            duplicates.append(row)
+        else:
+            serializer = StudentSerializer(data=row)
+            if serializer.is_valid():
+                serializer.save()
+                inserted.append(serializer.data)
+    return inserted, duplicates
+
+
+def enrollment_list(count, offset=0):
+    return [
+        {
+            'studentID': f'{(i // 10000000) % 100:02d}-{(i // 1000) % 10000:04d}-{i % 1000:03d}',
+            'name': f'Student {i}',
+            'course': f'COURSE{i % 40:02d}',
+            'time_left': 600,
+            'password': 'x',
+        }
+        for i in range(offset, offset + count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare the per-row student import with the bulk import path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--duplicates', type=int, default=500,
+                            help="How many rows of the list already exist before importing.")
+        parser.add_argument('--real-hasher', action='store_true',
+                            help="Hash with the configured PBKDF2 hasher. By default a fast hasher is used so the numbers show database cost only.")
+
+    def handle(self, *args, **options):
+        rows = enrollment_list(options['students'])
+        preexisting = rows[:options['duplicates']]
+        fast_hasher = {} if options['real_hasher'] else {'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher']}
+
+        results = {}
+        with throwaway_database(), override_settings(**fast_hasher):
+            for name, importer in [('per-row', per_row_import), ('bulk', import_students)]:
+                Student.objects.all().delete()
+                import_students(preexisting)
+
+                start = time.perf_counter()
+                inserted, duplicates = importer(rows)[:2]
+                results[name] = time.perf_counter() - start
+                self.stdout.write(f"{name:<8} {len(inserted)} inserted, {len(duplicates)} duplicates in {results[name]:.2f} s")
+
+        self.stdout.write(f"speedup: {results['per-row'] / results['bulk']:.1f}x")
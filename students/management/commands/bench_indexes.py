@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth
+
+from students.benchmarking import best_of, seed_sessions, seed_students, seed_transactions, throwaway_database
+from students.models import Session, Transaction
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and time the dashboard/list/logout queries with and without the Session/Transaction indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=1_000_000)
+        parser.add_argument('--students', type=int, default=20_000)
+        parser.add_argument('--transactions', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write(f"Seeding {options['students']} students, {options['sessions']} sessions, {options['transactions']} transactions...")
+            students = seed_students(options['students'])
+            year, semester_name = seed_sessions(options['sessions'], students, open_sessions=len(students) // 10)
+            seed_transactions(options['transactions'])
+
+            student_id = students[len(students) // 2][0]
+            open_student_id = Session.objects.filter(logoutTime__isnull=True).values_list('parent_id', flat=True).first()
+            reference = Transaction.objects.order_by('-id').values_list('reference_number', flat=True).first()
+
+            queries = {
+                'session hours by month': lambda: list(
+                    Session.objects.filter(year=year, semester_name=semester_name)
+                    .annotate(month=ExtractMonth('date')).values('month')
+                    .annotate(total_minutes=Sum('consumedTime')).order_by('month')
+                ),
+                'sessions by course/month': lambda: list(
+                    Session.objects.filter(year=year, semester_name=semester_name)
+                    .annotate(month=ExtractMonth('date')).values('course', 'month')
+                    .annotate(count=Count('id'))
+                ),
+                'income by month': lambda: list(
+                    Transaction.objects.filter(year=year, semester_name=semester_name)
+                    .annotate(month=ExtractMonth('timestamp')).values('month')
+                    .annotate(total_income=Sum('amount')).order_by('month')
+                ),
+                'student semester history': lambda: list(
+                    Session.objects.filter(parent_id=student_id, year=year, semester_name=semester_name)
+                ),
+                'open session lookup': lambda: Session.objects.filter(
+                    parent_id=open_student_id, logoutTime__isnull=True
+                ).first(),
+                'reference number check': lambda: Transaction.objects.filter(reference_number=reference).exists(),
+            }
+
+            indexes = [(Session, index) for index in Session._meta.indexes]
+            indexes += [(Transaction, index) for index in Transaction._meta.indexes]
+
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.remove_index(model, index)
+            without = {name: best_of(query, options['repeat']) for name, query in queries.items()}
+
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+            with_indexes = {name: best_of(query, options['repeat']) for name, query in queries.items()}
+
+        self.stdout.write(f"{'query':<28}{'no index (ms)':>16}{'indexed (ms)':>16}{'speedup':>10}")
+        for name in queries:
+            before, after = without[name] * 1000, with_indexes[name] * 1000
+            self.stdout.write(f"{name:<28}{before:>16.2f}{after:>16.2f}{before / max(after, 1e-6):>9.1f}x")
@@ -0,0 +1,111 @@
+import threading
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from students.accounting import close_session, credit_minutes, start_session
+from students.benchmarking import seed_students, throwaway_database
+from students.models import Session, Student
+
+INITIAL_MINUTES = 100_000
+TOP_UP_MINUTES = 60
+
+
+class LegacyAccounting:
+    # The read-modify-save() flow the views used before accounting.py
+
+    @staticmethod
+    def login(student_id):
+        student = Student.objects.get(studentID=student_id)
+        if student.is_logged_in or student.time_left == 0:
+            return False
+        student.is_logged_in = True
+        student.save()
+        Session.objects.create(parent=student, course=student.course)
+        return True
+
+    @staticmethod
+    def logout(student_id):
+        student = Student.objects.get(studentID=student_id)
+        session = Session.objects.filter(parent=student, logoutTime__isnull=True).first()
+        if session is None:
+            return
+        session.logoutTime = datetime.now().time()
+        session.consumedTime = 1
+        session.save()
+        student.is_logged_in = False
+        student.time_left -= 1
+        student.save()
+
+    @staticmethod
+    def top_up(student_id):
+        student = Student.objects.get(studentID=student_id)
+        student.time_left += TOP_UP_MINUTES
+        student.save()
+
+
+class AtomicAccounting:
+
+    @staticmethod
+    def login(student_id):
+        return start_session(Student.objects.get(studentID=student_id)) is not None
+
+    @staticmethod
+    def logout(student_id):
+        close_session(student_id, consumed_minutes=1)
+
+    @staticmethod
+    def top_up(student_id):
+        credit_minutes(Student.objects.only('id').get(studentID=student_id), TOP_UP_MINUTES)
+
+
+class Command(BaseCommand):
+    help = "Hammer login/logout/top-up from parallel clients and compare the legacy and atomic time accounting."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=16)
+        parser.add_argument('--students', type=int, default=4,
+                            help="Fewer students means more contention per row.")
+        parser.add_argument('--operations', type=int, default=200, help="Operations per client.")
+
+    def run(self, accounting, student_ids, clients, operations):
+        top_ups = [0] * clients
+        errors = []
+
+        def client(index):
+            student_id = student_ids[index % len(student_ids)]
+            try:
+                for _ in range(operations):
+                    if index % 4 == 0:
+                        accounting.top_up(student_id)
+                        top_ups[index] += 1
+                    elif accounting.login(student_id):
+                        accounting.logout(student_id)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        expected = len(student_ids) * INITIAL_MINUTES + sum(top_ups) * TOP_UP_MINUTES
+        expected -= sum(Session.objects.exclude(consumedTime=None).values_list('consumedTime', flat=True))
+        actual = sum(Student.objects.filter(studentID__in=student_ids).values_list('time_left', flat=True))
+        return clients * operations / elapsed, expected - actual, len(errors)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            student_ids = [student_id for student_id, _ in seed_students(options['students'])]
+            for name, accounting in [('legacy', LegacyAccounting), ('atomic', AtomicAccounting)]:
+                Session.objects.all().delete()
+                Student.objects.update(time_left=INITIAL_MINUTES, is_logged_in=False)
+                ops, lost, errors = self.run(accounting, student_ids, options['clients'], options['operations'])
+                self.stdout.write(f"{name:<7} {ops:8.0f} ops/s   minutes lost: {lost:6d}   errors: {errors}")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from students.models import Transaction
+from students.receipts import process_receipt
+
+
+class Command(BaseCommand):
+    help = "Downscale and strip receipts uploaded before background processing existed, and make their thumbnails."
+
+    def handle(self, *args, **options):
+        pending = (
+            Transaction.objects
+            .exclude(receipt_image='').exclude(receipt_image__isnull=True)
+            .filter(Q(receipt_thumbnail__isnull=True) | Q(receipt_thumbnail=''))
+            .values_list('id', flat=True)
+        )
+        processed = sum(process_receipt(transaction_id) for transaction_id in pending.iterator())
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} receipts."))
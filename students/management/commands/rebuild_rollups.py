@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from students.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly dashboard rollups from the raw Session and Transaction rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', help="Only rebuild this school year (e.g. 2024).")
+        parser.add_argument('--semester_name', help="Only rebuild this semester (e.g. firstsem).")
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups(year=options['year'], semester_name=options['semester_name'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} rollup rows."))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0018_alter_staff_password'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$08Mxr7syPwue16pZlZCadL$Js0z5Ewntnf5/SaoNRpO+Z9ltJQ3zss/UWCDZRHq3iU=', max_length=128),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['year', 'semester_name', 'date', 'consumedTime'], name='session_semester_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['year', 'semester_name', 'course', 'date'], name='session_semester_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['parent', 'year', 'semester_name', 'date'], name='session_parent_semester_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['parent', 'logoutTime'], name='session_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['year', 'semester_name', 'timestamp', 'amount'], name='transaction_semester_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['reference_number'], name='transaction_reference_idx'),
+        ),
+    ]
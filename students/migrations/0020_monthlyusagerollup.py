@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:07
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    # The chart endpoints only read the rollups, so fill them from the
+    # existing sessions and payments (what rebuild_rollups does)
+    from students.rollups import rollup_totals
+
+    MonthlyUsageRollup = apps.get_model('students', 'MonthlyUsageRollup')
+    buckets = rollup_totals(apps.get_model('students', 'Session'), apps.get_model('students', 'Transaction'))
+    MonthlyUsageRollup.objects.bulk_create(
+        [
+            MonthlyUsageRollup(year=y, semester_name=s, month=m, course=c, **totals)
+            for (y, s, m, c), totals in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0019_session_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$DIfswIlcBKMITsoAljsEH9$tBNMvF5z/DeZMuKAK3VZYoEKKcKRWQyasE3rVJA//6o=', max_length=128),
+        ),
+        migrations.CreateModel(
+            name='MonthlyUsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.CharField(max_length=10)),
+                ('semester_name', models.CharField(max_length=20)),
+                ('month', models.PositiveSmallIntegerField()),
+                ('course', models.CharField(max_length=255)),
+                ('minutes_used', models.PositiveIntegerField(default=0)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('income', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('year', 'semester_name', 'month', 'course'), name='monthly_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
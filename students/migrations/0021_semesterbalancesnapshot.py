@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0020_monthlyusagerollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$eVWxgLbf911TtAQAFyhNGl$VvkV1+06vxr75xnY7xk8yXTMru3/cBbgyRwHDO55XOI=', max_length=128),
+        ),
+        migrations.CreateModel(
+            name='SemesterBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.CharField(max_length=10)),
+                ('semester_name', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=15)),
+                ('time_left', models.PositiveIntegerField()),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='students.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'semester_name'], name='snapshot_semester_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0021_semesterbalancesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='kiosk',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$IXCjEWMKNfK2xi9Zc5lZar$5XNvCnzTKepqEPfeJKNgPfLhQU4255gnrrarCGOHCYg=', max_length=128),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0022_session_kiosk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KioskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.UUIDField(unique=True)),
+                ('kiosk', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('login', 'Login'), ('logout', 'Logout')], max_length=10)),
+                ('studentID', models.CharField(max_length=15)),
+                ('occurred_at', models.DateTimeField()),
+                ('consumed_minutes', models.PositiveIntegerField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$QCwnbp12u1HnhDlqMLWkfg$uB6ZMbl0rG5EqueojkOaHWmxEkuubC9cLI57Lbp16qQ=', max_length=128),
+        ),
+    ]
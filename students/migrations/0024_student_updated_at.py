@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0023_kioskevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$KrULWlUypxMSrnootX3HOi$Z/1xr3/tLKI7YTR7Yofr3okkDbZoPv4GI1Q/sbceblU=', max_length=128),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0024_student_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='receipt_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='receipts/thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$sqc4dlTpis99BTUvNCgH2j$UNQq0GRi9BW1CcduHz/P2XfbKBrtb4w8huoqNl1w2uM=', max_length=128),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:40
+
+import students.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0025_transaction_receipt_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='receipt_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$L84fykVeduS5rFdzpX43gb$KysrpPIYHokVtI5UJ2scabmIGqnM3hj5JWry2tA2Wts=', max_length=128),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='receipt_image',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=students.storage.ContentAddressedStorage(), upload_to='receipts/'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='receipt_thumbnail',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=students.storage.ContentAddressedStorage(), upload_to='receipts/thumbnails/'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['receipt_sha256'], name='transaction_receipt_hash_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0026_content_addressed_receipts'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_reference_idx',
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$LCc9DnYYemCL2ILRdSE4cP$+Y0AdNoQkZegRsL/vI6+5TEeovlZgeyxvlaZqkthC/k=', max_length=128),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='reference_number',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0027_unique_transaction_reference'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$nltI0EsN2nEqt5fic94bDB$KG93/JkDZn1Xfa7OQYi8EauND0/UyWYAmkkmpljFLps=', max_length=128),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['username', 'timestamp'], name='activitylog_user_time_idx'),
+        ),
+    ]
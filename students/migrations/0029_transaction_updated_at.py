@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0028_activitylog_user_time_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$GWyCYI0KZQ7QSHch8t8EsZ$LIr48fL0bxNGhhLmm6T/P4qbQZa7zPrJCz/cOf6FTQY=', max_length=128),
+        ),
+    ]
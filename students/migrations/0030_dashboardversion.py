@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0029_transaction_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$l2ngSoAL5hQy5qI50Y92yg$6tz86L9afiA09sH5Vo1YJzqBGgazq31MFHVvdpUTdvY=', max_length=128),
+        ),
+        migrations.CreateModel(
+            name='DashboardVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.CharField(max_length=10)),
+                ('semester_name', models.CharField(max_length=20)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('year', 'semester_name'), name='dashboard_version_semester')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0030_dashboardversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='login_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$pD3GTjU1pmB92zqKojkiVW$zxlsebeA8ttzJtlyA51GObg9OcUnY7lYCfgDZbk0+lU=', max_length=128),
+        ),
+    ]
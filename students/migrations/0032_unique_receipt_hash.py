@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:06
+
+from django.db import migrations, models
+
+
+def blank_hashes_to_null(apps, schema_editor):
+    # Transactions without a receipt stored '', which the unique index
+    # would count as duplicates of each other
+    Transaction = apps.get_model('students', 'Transaction')
+    Transaction.objects.filter(receipt_sha256='').update(receipt_sha256=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0031_session_login_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_receipt_hash_idx',
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='processed_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='password',
+            field=models.CharField(default='pbkdf2_sha256$1000000$WdkjxYM7jCj0OiJ0RvYqhk$965HhaqHBIN0tAnTCahqHCn9n5fMeKBprdcD3ysmK5s=', max_length=128),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='receipt_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(blank_hashes_to_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='transaction',
+            name='receipt_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['processed_sha256'], name='transaction_processed_hash_idx'),
+        ),
+    ]
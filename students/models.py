@@ -2,6 +2,8 @@ from django.db import models
 from django.core.validators import RegexValidator
 from django.contrib.auth.hashers import make_password
 from django.utils import timezone
+from .semester import get_current_semester
+from .storage import ContentAddressedStorage
 
 class Student(models.Model):
     STATUS_CHOICES = [
@@ -30,6 +32,10 @@ class Student(models.Model):
         default='Student'
     )
     is_logged_in = models.BooleanField(default=False)
+    # Bumped by save() and set explicitly by the bulk UPDATEs in accounting.py,
+    # rollover.py and the bulk password reset; validates the student list's
+    # ETag/Last-Modified (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -37,16 +43,38 @@ class Student(models.Model):
 
 class Transaction(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
-    reference_number = models.CharField(max_length=100)
+    reference_number = models.CharField(max_length=100, unique=True)
+    # Client-supplied Idempotency-Key header; a retried request gets the
+    # transaction its first attempt created
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True, unique=True)
     timestamp = models.DateTimeField(auto_now_add=True)
-    receipt_image = models.ImageField(upload_to='receipts/', null=True, blank=True)  # Add image field
+    # Moves when receipt processing rewrites the row, so list ETags follow it
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Stored under the hash of their content (see storage.py)
+    receipt_image = models.ImageField(upload_to='receipts/', storage=ContentAddressedStorage(), max_length=255, null=True, blank=True)  # Add image field
+    # Small JPEG for list pages, written by receipts.py after the upload is processed
+    receipt_thumbnail = models.ImageField(upload_to='receipts/thumbnails/', storage=ContentAddressedStorage(), max_length=255, null=True, blank=True)
+    # SHA-256 of the receipt as uploaded, so a resubmitted receipt is caught
+    # with one index lookup even after the stored copy has been re-encoded.
+    # Unique, with NULL for "no receipt" (MySQL has no partial indexes)
+    receipt_sha256 = models.CharField(max_length=64, null=True, blank=True, unique=True)
+    # SHA-256 of the re-encoded copy receipts.py stores, so a receipt
+    # downloaded from the system and uploaded again is caught too
+    processed_sha256 = models.CharField(max_length=64, blank=True)
     amount = models.IntegerField(null=True, blank=True)
     year = models.CharField(max_length=10, blank=True)
     semester_name = models.CharField(max_length=20, blank=True)
 
+    class Meta:
+        indexes = [
+            # Semester filters grouped by month on the income charts and lists
+            models.Index(fields=['year', 'semester_name', 'timestamp', 'amount'], name='transaction_semester_idx'),
+            models.Index(fields=['processed_sha256'], name='transaction_processed_hash_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        # Fetch the single Semester record to set year and semester_name
-        semester = Semester.objects.first()
+        # Stamp the active semester (cached per worker, see semester.py)
+        semester = get_current_semester()
         if semester:
             self.year = semester.year
             self.semester_name = semester.semester_name
@@ -70,14 +98,31 @@ class Session(models.Model):
     course = models.CharField(max_length=255)
     date = models.DateField(auto_now_add=True)
     loginTime = models.TimeField(auto_now_add=True)
+    # date and loginTime are wall-clock values of whichever machine opened the
+    # session (a kiosk's local time, or the server's); this is the same moment
+    # as an aware timestamp, for comparing against replayed kiosk events
+    login_at = models.DateTimeField(null=True, blank=True)
     logoutTime = models.TimeField(null=True, blank=True)
     consumedTime = models.IntegerField(null=True, blank=True)
     year = models.CharField(max_length=10, blank=True)
     semester_name = models.CharField(max_length=20, blank=True)
+    kiosk = models.CharField(max_length=100, blank=True)  # Lab PC the session was started from
+
+    class Meta:
+        indexes = [
+            # Dashboard filters: semester grouped by month (covers the minutes
+            # sum) and semester grouped by course and month
+            models.Index(fields=['year', 'semester_name', 'date', 'consumedTime'], name='session_semester_date_idx'),
+            models.Index(fields=['year', 'semester_name', 'course', 'date'], name='session_semester_course_idx'),
+            # A student's sessions within a semester (history, staff session list)
+            models.Index(fields=['parent', 'year', 'semester_name', 'date'], name='session_parent_semester_idx'),
+            # Logout looks up the student's single open session (logoutTime IS NULL)
+            models.Index(fields=['parent', 'logoutTime'], name='session_open_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        # Fetch the single Semester record to set year and semester_name
-        semester = Semester.objects.first()
+        # Stamp the active semester (cached per worker, see semester.py)
+        semester = get_current_semester()
         if semester:
             self.year = semester.year
             self.semester_name = semester.semester_name
@@ -93,6 +138,48 @@ class Semester(models.Model):
     def __str__(self):
         return f"{self.year} - {self.semester_name}"
 
+
+class SemesterBalanceSnapshot(models.Model):
+    # A student's remaining balance at the end of a semester, recorded by the
+    # semester rollover before time_left is reset (see rollover.py).
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='balance_snapshots')
+    year = models.CharField(max_length=10)
+    semester_name = models.CharField(max_length=20)
+    status = models.CharField(max_length=15)
+    time_left = models.PositiveIntegerField()
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['year', 'semester_name'], name='snapshot_semester_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.year} {self.semester_name}: {self.time_left}"
+
+
+class KioskEvent(models.Model):
+    # A login or logout replayed from a kiosk's offline journal
+    # (gui_app/journal.py). event_id is generated on the kiosk and unique, so
+    # a resent batch is only applied once (see kiosk_events.py).
+    LOGIN = 'login'
+    LOGOUT = 'logout'
+    KIND_CHOICES = [
+        (LOGIN, 'Login'),
+        (LOGOUT, 'Logout'),
+    ]
+
+    event_id = models.UUIDField(unique=True)
+    kiosk = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    studentID = models.CharField(max_length=15)
+    occurred_at = models.DateTimeField()
+    consumed_minutes = models.PositiveIntegerField(null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kiosk}: {self.kind} {self.studentID} at {self.occurred_at}"
+
     
 
 class StaffActivityLog(models.Model):
@@ -109,9 +196,55 @@ class ActivityLog(models.Model):
     action = models.TextField()
     timestamp = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # A staff member's log, newest first
+            models.Index(fields=['username', 'timestamp'], name='activitylog_user_time_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} - {self.action} at {self.timestamp}"
     
 
 def log_staff_activity(staff, action):
-    StaffActivityLog.objects.create(staff=staff, action=action)
+    # Buffered and written in batches (see activity_log.py)
+    from .activity_log import log_staff_action
+    log_staff_action(staff, action)
+
+
+class MonthlyUsageRollup(models.Model):
+    # Pre-aggregated dashboard figures, one row per (semester, month, course).
+    # Kept up to date by students.rollups as sessions close and payments come
+    # in; `manage.py rebuild_rollups` recomputes them from the raw tables.
+    year = models.CharField(max_length=10)
+    semester_name = models.CharField(max_length=20)
+    month = models.PositiveSmallIntegerField()
+    course = models.CharField(max_length=255)
+    minutes_used = models.PositiveIntegerField(default=0)
+    session_count = models.PositiveIntegerField(default=0)
+    income = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'semester_name', 'month', 'course'], name='monthly_rollup_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.year} {self.semester_name} month {self.month} - {self.course}"
+
+
+class DashboardVersion(models.Model):
+    # Per-semester data version for the cached dashboards (see
+    # dashboard_cache.py). Kept in the database because a culled or evicted
+    # cache counter would restart and bring old entries back.
+    year = models.CharField(max_length=10)
+    semester_name = models.CharField(max_length=20)
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'semester_name'], name='dashboard_version_semester'),
+        ]
+
+    def __str__(self):
+        return f"{self.year} {self.semester_name}: v{self.version}"
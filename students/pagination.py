@@ -0,0 +1,99 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Pagination is opt-in so existing clients that expect a plain list keep
+# working: a list endpoint only paginates when the request asks for it with
+# ?paginate=true or is following a cursor from a previous page.
+
+PAGINATE_PARAM = 'paginate'
+
+
+def paginate_requested(params):
+    return params.get(PAGINATE_PARAM, '').lower() in ('1', 'true', 'yes') or 'cursor' in params
+
+
+def wants_pagination(request):
+    if request is None:
+        return False
+    return paginate_requested(request.query_params)
+
+
+class OptInPaginationMixin:
+    @property
+    def paginator(self):
+        if not wants_pagination(getattr(self, 'request', None)):
+            return None
+        return super().paginator
+
+
+class StudentCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class TransactionCursorPagination(CursorPagination):
+    # Newest first; ids increase with timestamp
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class ActivityLogCursorPagination(BasePagination):
+    """Newest first, keyset-paginated on (timestamp, id) the way history.py
+    pages sessions. CursorPagination positions on the first ordering field
+    only and skips rows sharing its timestamp with an OFFSET, which a burst of
+    buffered log entries makes common; here the cursor holds both fields of
+    the last row, so every page is one range scan of activitylog_user_time_idx
+    for the username. Forward only, so 'previous' is always null."""
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            timestamp, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+        # One row past the page tells whether there is a next one
+        rows = list(queryset.order_by('-timestamp', '-id')[:page_size + 1])
+        self.last = rows[page_size - 1] if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, log):
+        key = f"{log.timestamp.isoformat()}|{log.id}"
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(timestamp), int(pk)
+        except ValueError:
+            raise NotFound("Invalid cursor")
+
+    def get_next_link(self):
+        if self.last is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), 'cursor', self.encode_cursor(self.last))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'previous': None, 'results': data})
@@ -0,0 +1,94 @@
+from collections import Counter
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .locks import cache_lock
+from .models import Session, Student
+
+# Who is in the lab right now, kept in the shared cache so every worker sees
+# the same picture and dashboard polls never query the database. Login and
+# logout (accounting.py) update it once their transaction commits. Each
+# worker rebuilds it from Student.is_logged_in and the open Session rows the
+# first time it is used, so it recovers from restarts and cache flushes.
+
+REGISTRY_KEY = 'presence:registry'
+LOCK_NAME = 'presence'
+
+_rebuilt = False
+
+
+def _load():
+    global _rebuilt
+    registry = cache.get(REGISTRY_KEY)
+    if registry is None or not _rebuilt:
+        registry = rebuild()
+    return registry
+
+
+def rebuild():
+    """Replace the registry with the login state recorded in the database."""
+    global _rebuilt
+    with cache_lock(LOCK_NAME):
+        registry = {}
+        open_sessions = (
+            Session.objects
+            .filter(logoutTime__isnull=True, parent__is_logged_in=True)
+            .order_by('id')
+            .values('parent_id', 'course', 'kiosk', 'date', 'loginTime')
+        )
+        for row in open_sessions:
+            since = timezone.make_aware(datetime.combine(row['date'], row['loginTime'])) if row['loginTime'] else None
+            registry[row['parent_id']] = _entry(row['course'], row['kiosk'], since)
+        # Logged in without an open session (e.g. a kiosk crashed mid-login)
+        for student_id, course in Student.objects.filter(is_logged_in=True).values_list('studentID', 'course'):
+            registry.setdefault(student_id, _entry(course, '', None))
+
+        cache.set(REGISTRY_KEY, registry, timeout=None)
+    _rebuilt = True
+    return registry
+
+
+def _entry(course, kiosk, since):
+    return {'course': course, 'kiosk': kiosk or '', 'since': since.isoformat() if since else None}
+
+
+def _update(change):
+    with cache_lock(LOCK_NAME):
+        registry = cache.get(REGISTRY_KEY)
+        if registry is None:
+            # Nothing to update; the next read rebuilds from the database
+            return
+        change(registry)
+        cache.set(REGISTRY_KEY, registry, timeout=None)
+
+
+def mark_online(student_id, course, kiosk=''):
+    def change(registry):
+        registry[student_id] = _entry(course, kiosk, timezone.now())
+    transaction.on_commit(lambda: _update(change))
+
+
+def mark_offline(*student_ids):
+    def change(registry):
+        for student_id in student_ids:
+            registry.pop(student_id, None)
+    transaction.on_commit(lambda: _update(change))
+
+
+def online_students():
+    """[{studentID, course, kiosk, since}, ...] ordered by login time."""
+    registry = _load()
+    students = [{'studentID': student_id, **entry} for student_id, entry in registry.items()]
+    return sorted(students, key=lambda student: student['since'] or '')
+
+
+def counts():
+    registry = _load()
+    return {
+        'logged_in_count': len(registry),
+        'by_course': dict(Counter(entry['course'] for entry in registry.values())),
+        'by_kiosk': dict(Counter(entry['kiosk'] for entry in registry.values() if entry['kiosk'])),
+    }
@@ -0,0 +1,120 @@
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Transaction
+
+# Receipt photos arrive straight from phone cameras (often 4-8 MB with EXIF,
+# GPS included). Once the transaction commits, a worker thread replaces the
+# upload with a downscaled, re-encoded JPEG without metadata and adds a
+# small thumbnail for the transaction list. The request only stores the raw
+# upload, so top-ups aren't slowed down by image work.
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_MAX_SIZE = (1600, 1600)
+RECEIPT_QUALITY = 80
+THUMBNAIL_SIZE = (200, 200)
+THUMBNAIL_QUALITY = 70
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'RECEIPT_WORKERS', 2), thread_name_prefix='receipts')
+    return _executor
+
+
+def schedule_receipt_processing(transaction_id):
+    """Process the transaction's receipt once the current transaction
+    commits; inline when RECEIPT_WORKERS is 0."""
+    def submit():
+        if getattr(settings, 'RECEIPT_WORKERS', 2) > 0:
+            _get_executor().submit(_run, transaction_id)
+        else:
+            process_receipt(transaction_id)
+    transaction.on_commit(submit)
+
+
+def _run(transaction_id):
+    try:
+        process_receipt(transaction_id)
+    except Exception:
+        logger.exception(f"Processing the receipt of transaction {transaction_id} failed")
+    finally:
+        # Worker threads get their own connection; don't leak it
+        connection.close()
+
+
+def _encode(image, size, quality):
+    image = image.copy()
+    image.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    # No exif= argument, so none of the original metadata is written
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def load_receipt(fileobj):
+    image = Image.open(fileobj)
+    # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale, far cheaper than a full
+    # decode followed by a resize; ask for the size the receipt ends up at
+    scale = min(RECEIPT_MAX_SIZE[0] / image.width, RECEIPT_MAX_SIZE[1] / image.height, 1)
+    image.draft('RGB', (round(image.width * scale), round(image.height * scale)))
+    # Apply the camera's orientation before the EXIF that records it is dropped
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def process_receipt(transaction_id):
+    """Downscale and strip the transaction's receipt and write its thumbnail.
+    Returns False if there was nothing to do or the upload isn't an image."""
+    payment = Transaction.objects.filter(pk=transaction_id).only('id', 'receipt_image', 'receipt_thumbnail').first()
+    if payment is None or not payment.receipt_image:
+        return False
+
+    original_name = payment.receipt_image.name
+    try:
+        with payment.receipt_image.open('rb') as fileobj:
+            image = load_receipt(fileobj)
+    except (OSError, Image.DecompressionBombError) as e:
+        logger.warning(f"Receipt {original_name} of transaction {transaction_id} is not a usable image: {e}")
+        return False
+
+    stem = os.path.splitext(os.path.basename(original_name))[0]
+    receipt = _encode(image, RECEIPT_MAX_SIZE, RECEIPT_QUALITY)
+    payment.receipt_image.save(f'{stem}.jpg', ContentFile(receipt), save=False)
+    payment.receipt_thumbnail.save(f'{stem}.jpg', ContentFile(_encode(image, THUMBNAIL_SIZE, THUMBNAIL_QUALITY)), save=False)
+
+    # update() rather than save(): save() would restamp the transaction with
+    # whatever semester is current by the time this runs. updated_at moves the
+    # transaction list's ETag, so cached copies pick up the new URLs.
+    Transaction.objects.filter(pk=transaction_id).update(
+        receipt_image=payment.receipt_image.name, receipt_thumbnail=payment.receipt_thumbnail.name,
+        processed_sha256=hashlib.sha256(receipt).hexdigest(), updated_at=timezone.now(),
+    )
+    if payment.receipt_image.name != original_name:
+        discard_receipt(original_name)
+    return True
+
+
+def discard_receipt(name):
+    """Delete a stored receipt file unless a transaction still points at it.
+    Stored files are shared by content (see storage.py)."""
+    if name and not Transaction.objects.filter(receipt_image=name).exists():
+        Transaction._meta.get_field('receipt_image').storage.delete(name)
@@ -0,0 +1,63 @@
+import time
+
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import SemesterBalanceSnapshot, Student
+
+# Semester rollover: snapshot every student's remaining balance for the
+# semester that just ended, then reset time_left by status. Both happen in
+# primary-key ranges of ROLLOVER_CHUNK_SIZE, each in its own short
+# transaction, so no lock is held on more than one chunk of students.
+
+ROLLOVER_CHUNK_SIZE = 1000
+
+# Minutes each status starts a new semester with
+SEMESTER_ALLOWANCE = {
+    'Student': 600,
+    'Alumnus': 0,
+}
+
+
+def rollover_students(previous_year, previous_semester_name, chunk_size=ROLLOVER_CHUNK_SIZE):
+    """Snapshot balances for the previous semester and reset time_left.
+    Returns a summary with the number of students updated and the time
+    taken."""
+    started = time.perf_counter()
+    bounds = Student.objects.aggregate(low=Min('id'), high=Max('id'))
+    snapshots = updated = chunks = 0
+
+    if bounds['low'] is not None:
+        for low in range(bounds['low'], bounds['high'] + 1, chunk_size):
+            pk_range = (low, low + chunk_size - 1)
+            with transaction.atomic():
+                balances = list(
+                    Student.objects.select_for_update()
+                    .filter(pk__range=pk_range)
+                    .values_list('id', 'status', 'time_left')
+                )
+                if not balances:
+                    continue
+
+                SemesterBalanceSnapshot.objects.bulk_create([
+                    SemesterBalanceSnapshot(
+                        student_id=pk, year=previous_year, semester_name=previous_semester_name,
+                        status=student_status, time_left=time_left,
+                    )
+                    for pk, student_status, time_left in balances
+                ])
+                snapshots += len(balances)
+
+                for student_status, minutes in SEMESTER_ALLOWANCE.items():
+                    updated += Student.objects.filter(pk__range=pk_range, status=student_status).update(
+                        time_left=minutes, updated_at=timezone.now(),
+                    )
+            chunks += 1
+
+    return {
+        'students_updated': updated,
+        'snapshots': snapshots,
+        'chunks': chunks,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
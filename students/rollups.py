@@ -0,0 +1,103 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth
+from django.utils import timezone
+
+from .dashboard_cache import bump_data_version
+from .models import MonthlyUsageRollup, Session, Transaction
+
+# Incremental maintenance of MonthlyUsageRollup. Callers run these inside the
+# same database transaction as the write they account for, so a rollup row
+# never disagrees with the sessions/transactions it summarises.
+
+
+def _bump(year, semester_name, month, course, **deltas):
+    key = {'year': year, 'semester_name': semester_name, 'month': month, 'course': course}
+    increments = {field: F(field) + value for field, value in deltas.items()}
+
+    if MonthlyUsageRollup.objects.filter(**key).update(**increments):
+        return
+    try:
+        # First write for this bucket; the unique key settles races with a
+        # concurrent first write, in which case we fall back to the UPDATE.
+        with transaction.atomic():
+            MonthlyUsageRollup.objects.create(**key, **deltas)
+    except IntegrityError:
+        MonthlyUsageRollup.objects.filter(**key).update(**increments)
+
+
+def record_session_closed(session):
+    _bump(
+        session.year, session.semester_name, session.date.month, session.course,
+        minutes_used=int(session.consumedTime or 0), session_count=1,
+    )
+    bump_data_version(session.year, session.semester_name)
+
+
+def record_transaction(payment):
+    _bump(
+        payment.year, payment.semester_name, timezone.localtime(payment.timestamp).month, payment.student.course,
+        income=payment.amount or 0,
+    )
+    bump_data_version(payment.year, payment.semester_name)
+
+
+def rollup_totals(session_model, transaction_model, **scope):
+    """{(year, semester_name, month, course): totals} aggregated from the raw
+    rows. Takes the models so the migration that creates the rollup table can
+    fill it with its historical ones."""
+    buckets = {}
+
+    def bucket(row, course):
+        key = (row['year'], row['semester_name'], row['month'], course)
+        return buckets.setdefault(key, {'minutes_used': 0, 'session_count': 0, 'income': 0})
+
+    sessions = (
+        session_model.objects
+        .filter(logoutTime__isnull=False, **scope)
+        .annotate(month=ExtractMonth('date'))
+        .values('year', 'semester_name', 'month', 'course')
+        .annotate(minutes=Sum('consumedTime'), count=Count('id'))
+    )
+    for row in sessions:
+        totals = bucket(row, row['course'])
+        totals['minutes_used'] += row['minutes'] or 0
+        totals['session_count'] += row['count']
+
+    payments = (
+        transaction_model.objects
+        .filter(**scope)
+        .annotate(month=ExtractMonth('timestamp'))
+        .values('year', 'semester_name', 'month', 'student__course')
+        .annotate(income=Sum('amount'))
+    )
+    for row in payments:
+        bucket(row, row['student__course'])['income'] += row['income'] or 0
+    return buckets
+
+
+def rebuild_rollups(year=None, semester_name=None):
+    """Recompute the rollups from Session/Transaction rows, optionally for a
+    single semester. Returns the number of rollup rows written."""
+    scope = {}
+    if year:
+        scope['year'] = year
+    if semester_name:
+        scope['semester_name'] = semester_name
+
+    buckets = rollup_totals(Session, Transaction, **scope)
+    with transaction.atomic():
+        rebuilt = set(MonthlyUsageRollup.objects.filter(**scope).values_list('year', 'semester_name').distinct())
+        rebuilt.update((y, s) for y, s, _, _ in buckets)
+        for y, s in rebuilt:
+            bump_data_version(y, s)
+
+        MonthlyUsageRollup.objects.filter(**scope).delete()
+        MonthlyUsageRollup.objects.bulk_create(
+            [
+                MonthlyUsageRollup(year=y, semester_name=s, month=m, course=c, **totals)
+                for (y, s, m, c), totals in buckets.items()
+            ],
+            batch_size=1000,
+        )
+    return len(buckets)
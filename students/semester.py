@@ -0,0 +1,65 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+# The active Semester is read on every Session/Transaction save and at the top
+# of most views, but it only changes when staff switch semesters. Each worker
+# keeps it in memory and reloads it only when the shared generation counter
+# (stored in the configured cache, so all gunicorn workers see it) moves.
+#
+# The cache may drop the counter at any time (FileBasedCache culls entries at
+# random once it is full, whatever their timeout). A counter restarted from a
+# fixed value could land on a generation some worker already loaded, and that
+# worker would keep the old semester, so a missing counter is reseeded from
+# the clock instead, and the reader that finds it missing always reloads.
+GENERATION_KEY = 'current_semester:generation'
+
+_lock = threading.Lock()
+_generation = None
+_semester = None
+
+
+def _new_generation():
+    # Larger than any value a counter seeded earlier has been incremented to
+    return time.time_ns()
+
+
+def _current_generation():
+    """The shared generation, or None if it had to be reseeded."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # add() is a no-op if another worker reseeded it first
+        cache.add(GENERATION_KEY, _new_generation(), timeout=None)
+    return generation
+
+
+def get_current_semester():
+    """Return the active Semester (or None) without hitting the database
+    unless the semester has changed since this worker last loaded it."""
+    global _generation, _semester
+
+    generation = _current_generation()
+    if generation is not None and generation == _generation:
+        return _semester
+
+    with _lock:
+        if generation is None or generation != _generation:
+            from .models import Semester
+            _semester = Semester.objects.first()
+            # None after a reseed, so the next read loads once more under the
+            # new value
+            _generation = generation
+        return _semester
+
+
+def invalidate_current_semester():
+    """Force every worker to reload the active semester on its next read."""
+    global _generation
+
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, _new_generation(), timeout=None)
+    with _lock:
+        _generation = None
@@ -1,11 +1,21 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password, check_password
-from .models import Student, Transaction, Staff, Session, StaffActivityLog, ActivityLog, Semester
+from .models import Student, Transaction, Staff, Session, StaffActivityLog, ActivityLog, Semester, KioskEvent
 from django.contrib.auth import authenticate
 from django.http import JsonResponse
 from django.contrib.auth.models import User
 
-class StudentSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    # Pass fields=[...] to serialize only those fields (sparse fieldsets)
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class StudentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
 
     class Meta:
@@ -31,12 +41,38 @@ class StudentSerializer(serializers.ModelSerializer):
         return super(StudentSerializer, self).update(instance, validated_data)
 
 
+class StudentImportSerializer(serializers.ModelSerializer):
+    # Validates import rows without touching the database: the per-row
+    # unique check on studentID is replaced by one set-based lookup per
+    # chunk in imports.py.
+    password = serializers.CharField(write_only=True, required=False)
+
+    class Meta:
+        model = Student
+        fields = ['studentID', 'name', 'course', 'time_left', 'password', 'status', 'is_logged_in']
+        extra_kwargs = {
+            'studentID': {'validators': Student._meta.get_field('studentID').validators},
+        }
+
+
+class KioskEventSerializer(serializers.Serializer):
+    event_id = serializers.UUIDField()
+    kind = serializers.ChoiceField(choices=KioskEvent.KIND_CHOICES)
+    studentID = serializers.CharField(max_length=15)
+    occurred_at = serializers.DateTimeField()
+    # Seconds since the event by the kiosk's monotonic clock; null if the
+    # kiosk has rebooted since
+    age = serializers.FloatField(required=False, allow_null=True, min_value=0)
+    consumed_minutes = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+
+
 class TransactionSerializer(serializers.ModelSerializer):
     student_id = serializers.ReadOnlyField(source='student.studentID')  
 
     class Meta:
         model = Transaction
-        fields = ['id', 'student', 'student_id', 'reference_number', 'timestamp','receipt_image', 'amount']
+        fields = ['id', 'student', 'student_id', 'reference_number', 'timestamp','receipt_image', 'receipt_thumbnail', 'amount']
+        read_only_fields = ['receipt_thumbnail']  # Generated in the background (see receipts.py)
 
 class StaffSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
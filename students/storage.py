@@ -0,0 +1,58 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Receipts are stored under the SHA-256 of their content,
+# receipts/<aa>/<bb>/<sha256>.<ext>, instead of the client's filename. The
+# same file uploaded twice ends up as one file on disk, and the two levels of
+# 256 directories keep every directory small however many receipts pile up.
+
+
+def file_sha256(fileobj):
+    """Hex SHA-256 of an uploaded file, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in fileobj.chunks():
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save, and equal content is
+        # meant to share a file, so there is no collision to avoid here
+        return name
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        os.makedirs(self.location, exist_ok=True)
+
+        # Hash while streaming the upload into a temporary file next to the
+        # final location, then move it into place under its hash
+        digest = hashlib.sha256()
+        fd, partial = tempfile.mkstemp(dir=self.location, suffix='.partial')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            sha256 = digest.hexdigest()
+            stored = posixpath.join(directory, sha256[:2], sha256[2:4], sha256 + extension)
+            path = self.path(stored)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(partial, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+            return stored
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
@@ -1,3 +1,1155 @@
-from django.test import TestCase
+import importlib
+import io
+import hashlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+import tempfile
+import threading
+import time
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+import openpyxl
+from PIL import Image
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.contrib.auth.hashers import MD5PasswordHasher, check_password
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gui_app.api_client import ApiError, StudentApiClient
+from gui_app.journal import SessionJournal
+from gui_app.login import OrmBackend
+
+from .models import Student, Session, Semester, MonthlyUsageRollup, SemesterBalanceSnapshot, KioskEvent, Transaction, ActivityLog, Staff, StaffActivityLog, log_staff_activity
+from .rollover import rollover_students
+from .accounting import close_session, credit_minutes, start_session
+from . import activity_log, dashboard_cache, export_jobs, exports, locks, presence, semester
+from .hashing import hash_passwords
+from .rollups import rebuild_rollups
+from .semester import get_current_semester, invalidate_current_semester
+
+
+def start_semester():
+    """Empty the test cache and make 2024 firstsem the current semester."""
+    cache.clear()
+    invalidate_current_semester()
+    return Semester.objects.create(year='2024', semester_name='firstsem')
+
+
+class SemesterSetupMixin:
+    """start_semester() and one student, self.student."""
+
+    def setUp(self):
+        super().setUp()
+        start_semester()
+        self.student = Student.objects.create(
+            studentID='21-1234-567', name='Juan', course='BSIT', time_left=600, password='x'
+        )
+
+
+class CurrentSemesterTests(SemesterSetupMixin, TestCase):
+    def test_session_save_does_not_query_semester(self):
+        get_current_semester()  # warm this worker's copy
+
+        # Only the INSERT itself should reach the database
+        with self.assertNumQueries(1):
+            session = Session.objects.create(parent=self.student, course='BSIT')
+
+        self.assertEqual((session.year, session.semester_name), ('2024', 'firstsem'))
+
+    def test_semester_list_view_skips_semester_lookup(self):
+        get_current_semester()
+        client = APIClient()
+
+        # The ETag aggregate and the rows; no Semester query
+        with self.assertNumQueries(2):
+            response = client.get(f'/api/sessions/{self.student.studentID}/')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_upsert_invalidates_cached_semester(self):
+        self.assertEqual(get_current_semester().semester_name, 'firstsem')
+
+        response = APIClient().put('/api/semesters/', {'semester_name': 'secondsem'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_current_semester().semester_name, 'secondsem')
+        session = Session.objects.create(parent=self.student, course='BSIT')
+        self.assertEqual(session.semester_name, 'secondsem')
+
+    def test_switch_survives_a_culled_generation(self):
+        # Load from a freshly seeded counter, as after an earlier cull
+        cache.delete(semester.GENERATION_KEY)
+        get_current_semester()
+        self.assertEqual(get_current_semester().semester_name, 'firstsem')
+        # Another worker switches the semester, then the cache drops the counter
+        Semester.objects.update(semester_name='secondsem')
+        cache.incr(semester.GENERATION_KEY)
+        cache.delete(semester.GENERATION_KEY)
+
+        self.assertEqual(get_current_semester().semester_name, 'secondsem')
+        with self.assertNumQueries(1):  # reloads once more for the reseeded value
+            get_current_semester()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_current_semester().semester_name, 'secondsem')
+
+
+class MonthlyRollupTests(SemesterSetupMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_logout_and_payment_update_rollup(self):
+        Session.objects.create(parent=self.student, course='BSIT')
+        Student.objects.filter(pk=self.student.pk).update(is_logged_in=True)
+
+        self.client.post('/api/logout-student/', {'studentID': self.student.studentID})
+        self.client.post('/api/transactions/create/', {
+            'reference_number': 'REF-1', 'student_id': self.student.studentID, 'hours': 2,
+        })
+
+        rollup = MonthlyUsageRollup.objects.get(course='BSIT')
+        self.assertEqual((rollup.session_count, rollup.income), (1, 30))
+
+        # The incremental rows match a rebuild from the raw tables
+        incremental = list(MonthlyUsageRollup.objects.values('month', 'course', 'minutes_used', 'session_count', 'income'))
+        rebuild_rollups()
+        rebuilt = list(MonthlyUsageRollup.objects.values('month', 'course', 'minutes_used', 'session_count', 'income'))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_migration_backfills_existing_semesters(self):
+        Session.objects.create(parent=self.student, course='BSIT', logoutTime=datetime.now().time(), consumedTime=45)
+        Transaction.objects.create(reference_number='REF-1', student=self.student, amount=30)
+
+        migration = importlib.import_module('students.migrations.0020_monthlyusagerollup')
+        migration.backfill_rollups(django_apps, None)
+
+        rollup = MonthlyUsageRollup.objects.get()
+        self.assertEqual((rollup.minutes_used, rollup.session_count, rollup.income), (45, 1, 30))
+
+    def test_chart_endpoints_read_rollups(self):
+        MonthlyUsageRollup.objects.create(
+            year='2024', semester_name='firstsem', month=8, course='BSIT', minutes_used=90, session_count=3, income=45
+        )
+        get_current_semester()
+
+        # The semester's data version, then the rollup aggregate
+        with self.assertNumQueries(2):
+            hours = self.client.get('/api/session-hours/').json()
+        income = self.client.get('/api/transaction-income/').json()
+        courses = self.client.get('/api/courses-count/').json()
+
+        self.assertEqual(hours, [{'month': 'August', 'total_hours': 1.5}])
+        self.assertEqual(income, [{'month': 'August', 'total_income': 45}])
+        self.assertEqual(courses, {'data': {'BSIT': [{'month': 'August', 'count': 3}]}})
+
+
+class CourseCountsQueryTests(TestCase):
+    def setUp(self):
+        start_semester()
+        MonthlyUsageRollup.objects.bulk_create([
+            MonthlyUsageRollup(year='2024', semester_name=sem, month=month, course=f'COURSE{i:02d}', session_count=i + 1)
+            for sem in ('firstsem', 'secondsem')
+            for i in range(40)
+            for month in (8, 9, 10)
+        ])
+        get_current_semester()
+        self.client = APIClient()
+
+    def test_query_count_independent_of_course_count(self):
+        # Data version and the aggregate; a past semester is first checked to
+        # exist (Semester, then rollups) before its result is cached
+        with self.assertNumQueries(2):
+            current = self.client.get('/api/courses-count/').json()['data']
+        with self.assertNumQueries(4):
+            previous = self.client.get('/api/previous-count/', {'year': '2024', 'semester_name': 'secondsem'}).json()['data']
+
+        self.assertEqual(len(current), 40)
+        self.assertEqual(current, previous)
+        self.assertEqual(current['COURSE03'], [
+            {'month': 'August', 'count': 4}, {'month': 'September', 'count': 4}, {'month': 'October', 'count': 4},
+        ])
+
+
+@override_settings(EXPORT_CACHE_DIR=tempfile.mkdtemp())
+class ExportTests(SemesterSetupMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for _ in range(3):
+            Session.objects.create(parent=self.student, course='BSIT', consumedTime=30)
+
+    def test_export_streams_workbook(self):
+        response = APIClient().get('/api/export/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('firstsem_2024_records.xlsx', response['Content-Disposition'])
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        sessions = list(workbook['Sessions'].values)
+        self.assertEqual(len(sessions), 4)
+        self.assertEqual(sessions[1][1:3], ('21-1234-567', 'BSIT'))
+        self.assertEqual(list(workbook['Transactions'].values)[0][0], 'Reference Number')
+
+    def test_rows_are_paged_by_id(self):
+        with mock.patch('students.exports.CHUNK_SIZE', 2), self.assertNumQueries(2):
+            rows = list(exports.semester_rows(Session, ['parent_id', 'consumedTime'], '2024', 'firstsem'))
+
+        self.assertEqual(rows, [('21-1234-567', 30)] * 3)
+
+
+@override_settings(EXPORT_CACHE_DIR=tempfile.mkdtemp())
+class ExportJobTests(SemesterSetupMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        Session.objects.create(parent=self.student, course='BSIT', consumedTime=30)
+        self.client = APIClient()
+
+    def wait_for(self, job_id):
+        for _ in range(100):
+            job = self.client.get(f'/api/export/jobs/{job_id}/').json()
+            if job['status'] in ('done', 'failed'):
+                return job
+            time.sleep(0.05)
+        self.fail('export job did not finish')
+
+    def test_job_builds_once_and_reuses_artifact(self):
+        started = self.client.post('/api/export/jobs/')
+        self.assertEqual(started.status_code, 202)
+        job = self.wait_for(started.json()['id'])
+        self.assertEqual((job['status'], job['rows_written']), ('done', 1))
+
+        download = self.client.get(f'/api/export/jobs/{job["id"]}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(len(list(openpyxl.load_workbook(io.BytesIO(b''.join(download.streaming_content)))['Sessions'].values)), 2)
+
+        # Unchanged data: served from the cached file straight away
+        again = self.client.post('/api/export/jobs/')
+        self.assertEqual((again.status_code, again.json()['watermark']), (200, job['watermark']))
+
+        # A new session moves the watermark and needs a fresh build
+        Session.objects.create(parent=self.student, course='BSIT')
+        fresh = self.client.post('/api/export/jobs/').json()
+        self.assertNotEqual(fresh['watermark'], job['watermark'])
+        self.assertEqual(self.wait_for(fresh['id'])['rows_written'], 2)
+
+    def test_job_of_a_dead_worker_is_restarted(self):
+        watermark, _ = export_jobs.semester_watermark('2024', 'firstsem')
+        orphan = {'id': 'orphan', 'year': '2024', 'semester_name': 'firstsem', 'watermark': watermark, 'status': 'running'}
+        export_jobs._save_job(orphan)
+        cache.set(export_jobs._active_key('2024', 'firstsem', watermark), 'orphan')
+        orphan['heartbeat'] -= export_jobs.STALE_AFTER + 1
+        cache.set(export_jobs._job_key('orphan'), orphan)
+
+        self.assertEqual(self.client.get('/api/export/jobs/orphan/').json()['status'], 'failed')
+        started = self.client.post('/api/export/jobs/').json()
+        self.assertNotEqual(started['id'], 'orphan')
+        self.assertEqual(self.wait_for(started['id'])['status'], 'done')
+
+
+class RenamedMD5PasswordHasher(MD5PasswordHasher):
+    algorithm = 'renamed_md5'
+
+
+class ImportStudentTests(TestCase):
+    def setUp(self):
+        Student.objects.create(studentID='21-0000-001', name='Existing', course='BSIT', time_left=600, password='x')
+        self.client = APIClient()
+
+    def row(self, student_id, **extra):
+        return {'studentID': student_id, 'name': 'New', 'course': 'BSCS', 'time_left': 600, 'password': 'x', **extra}
+
+    def test_bulk_import_reports_inserted_and_duplicates(self):
+        rows = [self.row(f'21-0000-{i:03d}') for i in range(1, 8)] + [self.row('21-0000-002')]
+
+        # The duplicate lookup, its re-check inside the transaction and one
+        # INSERT for the chunk, plus the savepoint pair
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/import-student/', rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([s['studentID'] for s in response.data['inserted']], [f'21-0000-{i:03d}' for i in range(2, 8)])
+        self.assertEqual([s['studentID'] for s in response.data['duplicates']], ['21-0000-001', '21-0000-002'])
+        self.assertNotIn('password', response.data['inserted'][0])
+
+    def test_invalid_row_rolls_back_whole_import(self):
+        response = self.client.post('/api/import-student/', [self.row('21-0000-002'), self.row('bad-id')], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('studentID', response.data['errors'])
+        self.assertFalse(Student.objects.filter(studentID='21-0000-002').exists())
+
+
+class BulkResetPasswordTests(TestCase):
+    def setUp(self):
+        Student.objects.bulk_create([
+            Student(studentID=f'21-0000-{i:03d}', name='S', course='BSIT', time_left=600, password='x', is_logged_in=True)
+            for i in range(12)
+        ])
+
+    @override_settings(PASSWORD_HASH_WORKERS=2)
+    def test_resets_in_parallel(self):
+        ids = [f'21-0000-{i:03d}' for i in range(10)] + ['99-9999-999']
+
+        response = APIClient().post('/api/students/bulk/reset-password/', {'studentIDs': ids}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['reset'], response.data['not_found']), (10, ['99-9999-999']))
+        hashes = list(Student.objects.filter(studentID__in=ids).values_list('password', flat=True))
+        self.assertEqual(len(set(hashes)), 10)  # salted individually
+        self.assertTrue(all(check_password('123456', hashed) for hashed in hashes))
+        self.assertEqual(Student.objects.filter(is_logged_in=True).count(), 2)
+
+    @override_settings(PASSWORD_HASH_WORKERS=2, PASSWORD_HASHERS=['students.tests.RenamedMD5PasswordHasher'])
+    def test_workers_use_runtime_hasher_override(self):
+        # The spawned workers only know the settings module's hashers
+        hashes = hash_passwords(['123456'] * 10)
+
+        self.assertTrue(all(hashed.startswith('renamed_md5$') for hashed in hashes))
+        self.assertTrue(all(check_password('123456', hashed) for hashed in hashes))
+
+    @override_settings(PASSWORD_HASH_WORKERS=2)
+    def test_pool_is_shut_down_after_the_call(self):
+        hash_passwords(['123456'] * 10)
+
+        self.assertEqual(multiprocessing.active_children(), [])
+
+
+class SemesterRolloverTests(TestCase):
+    def setUp(self):
+        Student.objects.bulk_create([
+            Student(studentID=f'21-0000-{i:03d}', name='S', course='BSIT', time_left=i, password='x',
+                    status='Alumnus' if i % 3 == 0 else 'Student')
+            for i in range(25)
+        ])
+
+    def test_rollover_resets_by_status_and_snapshots_balances(self):
+        summary = rollover_students('2024', 'firstsem', chunk_size=10)
+
+        self.assertEqual((summary['students_updated'], summary['snapshots'], summary['chunks']), (25, 25, 3))
+        self.assertEqual(set(Student.objects.filter(status='Alumnus').values_list('time_left', flat=True)), {0})
+        self.assertEqual(set(Student.objects.filter(status='Student').values_list('time_left', flat=True)), {600})
+        snapshot = SemesterBalanceSnapshot.objects.get(student__studentID='21-0000-007')
+        self.assertEqual((snapshot.year, snapshot.semester_name, snapshot.time_left), ('2024', 'firstsem', 7))
+
+    def test_semester_change_reports_rollover(self):
+        start_semester()
+
+        response = APIClient().put('/api/semesters/', {'semester_name': 'secondsem'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['semester_name'], 'secondsem')
+        self.assertEqual(response.data['rollover']['students_updated'], 25)
+        self.assertIn('duration_ms', response.data['rollover'])
+        self.assertEqual(SemesterBalanceSnapshot.objects.filter(semester_name='firstsem').count(), 25)
+
+
+class StudentListTests(TestCase):
+    def setUp(self):
+        Student.objects.bulk_create([
+            Student(studentID=f'21-0000-{i:03d}', name=f'S{i}', course='BSIT' if i % 2 else 'BSCS',
+                    time_left=600, password='x', is_logged_in=i < 3)
+            for i in range(7)
+        ])
+        self.client = APIClient()
+
+    def test_plain_list_unchanged_without_opt_in(self):
+        data = self.client.get('/api/students/').json()
+
+        self.assertEqual(len(data), 7)
+        self.assertEqual(set(data[0]), {'studentID', 'name', 'course', 'time_left', 'status', 'is_logged_in'})
+
+    def test_cursor_pages_with_filters_and_fields(self):
+        params = {'paginate': 'true', 'page_size': 2, 'course': 'BSIT', 'fields': 'studentID,course'}
+        first = self.client.get('/api/students/', params).json()
+
+        self.assertEqual(first['results'], [
+            {'studentID': '21-0000-001', 'course': 'BSIT'}, {'studentID': '21-0000-003', 'course': 'BSIT'},
+        ])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([s['studentID'] for s in second['results']], ['21-0000-005'])
+        self.assertIsNone(second['next'])
+
+        online = self.client.get('/api/students/', {'is_logged_in': 'true', 'fields': 'studentID'}).json()
+        self.assertEqual(online, [{'studentID': f'21-0000-{i:03d}'} for i in range(3)])
+
+
+class CloseSessionTests(TestCase):
+    def test_overdrawn_logout_clamps_to_zero(self):
+        student = Student.objects.create(studentID='21-1234-567', name='Juan', course='BSIT', time_left=10, password='x')
+        start_session(student)
+
+        session = close_session(student.studentID, consumed_minutes=45)
+
+        self.assertEqual(session.consumedTime, 45)
+        student.refresh_from_db()
+        self.assertEqual((student.time_left, student.is_logged_in), (0, False))
+
+    def test_login_time_is_stored(self):
+        student = Student.objects.create(studentID='21-1234-567', name='Juan', course='BSIT', time_left=600, password='x')
+        login_time = datetime.now().replace(microsecond=0) - timedelta(hours=3)
+
+        start_session(student, login_time)
+
+        session = Session.objects.get()
+        self.assertEqual(datetime.combine(session.date, session.loginTime), login_time)
+        self.assertAlmostEqual(session.login_at, timezone.now() - timedelta(hours=3), delta=timedelta(seconds=5))
+
+
+class TimeAccountingStressTests(TransactionTestCase):
+    def test_parallel_kiosks_and_topups_keep_balance(self):
+        student = Student.objects.create(studentID='21-1234-567', name='Juan', course='BSIT', time_left=10000, password='x')
+        logins = []
+        errors = []
+
+        def kiosk():
+            try:
+                for _ in range(10):
+                    if start_session(student):
+                        logins.append(1)
+                        close_session(student.studentID, consumed_minutes=1)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        def front_desk():
+            try:
+                for _ in range(10):
+                    credit_minutes(student, 60)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=kiosk) for _ in range(8)] + [threading.Thread(target=front_desk) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        student.refresh_from_db()
+        closed = Session.objects.filter(logoutTime__isnull=False)
+        # Every top-up and every charged minute is accounted for
+        self.assertEqual(closed.count(), len(logins))
+        self.assertEqual(student.time_left, 10000 + 4 * 10 * 60 - len(logins))
+        self.assertFalse(student.is_logged_in)
+        self.assertFalse(Session.objects.filter(logoutTime__isnull=True).exists())
+
+
+class PresenceRegistryTests(TestCase):
+    def setUp(self):
+        start_semester()
+        self.students = Student.objects.bulk_create([
+            Student(studentID=f'21-0000-{i:03d}', name='S', course='BSIT' if i else 'BSCS', time_left=600, password='x')
+            for i in range(3)
+        ])
+        presence.rebuild()
+        self.client = APIClient()
+
+    def test_login_and_logout_update_registry_without_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for student in self.students:
+                start_session(student, kiosk='PC-01' if student.course == 'BSIT' else 'PC-02')
+        with self.captureOnCommitCallbacks(execute=True):
+            close_session('21-0000-002', consumed_minutes=5)
+
+        with self.assertNumQueries(0):
+            counts = self.client.get('/api/count_loggedin/').json()
+            online = self.client.get('/api/online/').json()
+
+        self.assertEqual(counts, {'logged_in_count': 2, 'by_course': {'BSCS': 1, 'BSIT': 1}, 'by_kiosk': {'PC-02': 1, 'PC-01': 1}})
+        self.assertEqual({s['studentID'] for s in online['students']}, {'21-0000-000', '21-0000-001'})
+
+    def test_rebuilds_from_database(self):
+        start_session(self.students[0], kiosk='PC-07')  # on_commit never runs in this test
+        Student.objects.filter(studentID='21-0000-002').update(is_logged_in=True)
+
+        cache.delete(presence.REGISTRY_KEY)
+        online = {s['studentID']: s['kiosk'] for s in presence.online_students()}
+
+        self.assertEqual(online, {'21-0000-000': 'PC-07', '21-0000-002': ''})
+
+
+class CacheLockTests(SimpleTestCase):
+    def test_lock_is_exclusive_until_released(self):
+        with locks.cache_lock('rollup'):
+            with self.assertRaises(locks.LockTimeout):
+                with locks.cache_lock('rollup', wait=0.05):
+                    pass
+        with locks.cache_lock('rollup', wait=0):
+            pass
+
+    def test_lock_of_a_dead_holder_is_free(self):
+        code = (
+            "import fcntl, os, sys; "
+            "fd = os.open(sys.argv[1], os.O_CREAT | os.O_RDWR); "
+            "fcntl.flock(fd, fcntl.LOCK_EX); print('held', flush=True); sys.stdin.read()"
+        )
+        holder = subprocess.Popen([sys.executable, '-c', code, locks._lock_path('lock:rollup')],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        self.assertEqual(holder.stdout.readline().strip(), 'held')
+        with self.assertRaises(locks.LockTimeout):
+            with locks.cache_lock('rollup', wait=0.05):
+                pass
+
+        holder.kill()
+        holder.wait()
+        holder.stdin.close()
+        holder.stdout.close()
+        with locks.cache_lock('rollup', wait=1):
+            pass
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests.append((self.path, self.client_address[1]))
+        status, payload, delay = self.server.responses.pop(0)
+        time.sleep(delay)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # the client timed out first
+
+    def log_message(self, *args):
+        pass
+
+
+class KioskOrmBackendTests(SimpleTestCase):
+    def test_refuses_a_cache_only_the_kiosk_sees(self):
+        # Presence and the semester/dashboard versions would never reach the server
+        with self.assertRaises(ImproperlyConfigured):
+            OrmBackend()
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://lic-server:6379'}})
+    def test_accepts_the_shared_cache(self):
+        OrmBackend()
+
+
+class KioskApiClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+        self.server.requests = []
+        self.server.responses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = StudentApiClient(f'http://127.0.0.1:{self.server.server_port}', timeout=(1, 0.5), kiosk='PC-01')
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, status, payload, delay=0):
+        self.server.responses.append((status, payload, delay))
+
+    def test_requests_reuse_one_connection(self):
+        self.respond(200, {'time_left': 90})
+        self.respond(200, {'sessions': [], 'next': None})
+        self.respond(200, {'message': 'Logout successful'})
+
+        self.assertEqual(self.client.login('21-0000-001', 'secret'), 90)
+        self.client.history('21-0000-001')
+        self.client.logout('21-0000-001')
+
+        paths = [path for path, _ in self.server.requests]
+        self.assertEqual(paths, ['/api/login-student/', '/api/check-history-student/', '/api/logout-student/'])
+        self.assertEqual(len({port for _, port in self.server.requests}), 1)
+
+    def test_gateway_errors_are_retried(self):
+        self.respond(503, {})
+        self.respond(200, {'time_left': 30})
+
+        self.assertEqual(self.client.login('21-0000-001', 'secret'), 30)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_error_responses_raise_api_error(self):
+        self.respond(401, {'error': 'Password reset required. Please change your password.'})
+        self.respond(400, {'error': 'Already logged in'})
+
+        with self.assertRaises(ApiError) as reset:
+            self.client.login('21-0000-001', '123456')
+        with self.assertRaises(ApiError) as duplicate:
+            self.client.login('21-0000-001', 'secret')
+
+        self.assertEqual(reset.exception.status, 401)
+        self.assertEqual((duplicate.exception.status, duplicate.exception.message), (400, 'Already logged in'))
+
+    def test_read_timeout_is_not_retried(self):
+        self.respond(200, {'message': 'Logout successful'}, delay=1)
+
+        with self.assertRaises(ApiError) as error:
+            self.client.logout('21-0000-001')
+
+        self.assertIsNone(error.exception.status)
+        self.assertEqual(len(self.server.requests), 1)
+
+
+class SessionJournalTests(SimpleTestCase):
+    def test_sync_sends_batches_and_keeps_events_on_failure(self):
+        batches = []
+
+        def send(events):
+            if not batches:
+                batches.append(None)
+                raise ConnectionError("server unreachable")
+            batches.append([event['event_id'] for event in events])
+            return batches[-1]
+
+        journal = SessionJournal(':memory:', send=send, batch_size=2)
+        event_ids = [journal.record('logout', f'21-0000-00{i}', i) for i in range(5)]
+
+        with self.assertRaises(ConnectionError):
+            journal.sync()
+        self.assertEqual(len(journal.pending()), 5)
+
+        self.assertEqual(journal.sync(), 5)
+        self.assertEqual(batches[1:], [event_ids[:2], event_ids[2:4], event_ids[4:]])
+        self.assertEqual(journal.pending(), [])
+
+
+class KioskEventTests(SemesterSetupMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        start_session(self.student, datetime.now() - timedelta(minutes=30), kiosk='PC-01')
+        self.client = APIClient()
+        self.journal = SessionJournal(':memory:', send=self.send)
+
+    def send(self, events):
+        response = self.client.post('/api/kiosk-events/', {'kiosk': 'PC-01', 'events': events}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['accepted']
+
+    def test_replayed_logout_is_applied_once(self):
+        self.journal.record('login', self.student.studentID)
+        self.journal.record('logout', self.student.studentID, 29)
+        events = self.journal.pending()
+
+        self.assertEqual(self.journal.sync(), 2)
+        self.assertEqual(self.send(events), [event['event_id'] for event in events])
+
+        session = Session.objects.get()
+        self.assertIsNotNone(session.logoutTime)
+        self.assertEqual(session.consumedTime, 29)
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.time_left, self.student.is_logged_in), (571, False))
+        self.assertEqual(KioskEvent.objects.count(), 2)
+
+    def test_stale_logout_leaves_newer_session_open(self):
+        self.journal.record('logout', self.student.studentID, 5)
+        event = self.journal.pending()[0]
+        event['age'] = 3600  # before the open session started
+
+        self.send([event])
+
+        self.assertIsNone(Session.objects.get().logoutTime)
+        self.assertTrue(Student.objects.get(pk=self.student.pk).is_logged_in)
+
+    def test_logout_replayed_for_a_kiosk_ahead_of_utc(self):
+        # Opened 30 minutes ago on a UTC+8 kiosk, which wrote its local time
+        login_at = timezone.now() - timedelta(minutes=30)
+        kiosk_login = timezone.make_naive(login_at) + timedelta(hours=8)
+        Session.objects.update(login_at=login_at, date=kiosk_login.date(), loginTime=kiosk_login.time())
+
+        self.journal.record('logout', self.student.studentID, 30)
+        self.send(self.journal.pending())
+
+        session = Session.objects.get()
+        logout = datetime.combine(session.date, session.logoutTime)
+        self.assertAlmostEqual((logout - kiosk_login).total_seconds(), 30 * 60, delta=5)
+        self.assertFalse(Student.objects.get(pk=self.student.pk).is_logged_in)
+
+
+class SessionHistoryTests(SemesterSetupMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Two sessions share a login time so the id tie-breaker is exercised
+        for day, login_time, minutes in [
+            ('2024-08-01', '08:00', 10), ('2024-08-01', '13:00', 20), ('2024-08-02', '09:00', 30),
+            ('2024-08-02', '09:00', 40), ('2024-08-05', '10:00', 50), ('2024-08-07', '11:00', 60),
+            ('2024-08-09', '12:00', 70),
+        ]:
+            session = Session.objects.create(parent=self.student, course='BSIT')
+            Session.objects.filter(pk=session.pk).update(
+                date=day, loginTime=login_time, logoutTime='23:00', consumedTime=minutes,
+            )
+        get_current_semester()
+
+    def test_cursor_pages_cover_every_session_newest_first(self):
+        client = APIClient()
+        url = f'/api/sessions/{self.student.studentID}/?paginate=true&page_size=3'
+        pages = []
+        while url:
+            with self.assertNumQueries(2):  # ETag aggregate + one keyset page
+                page = client.get(url).json()
+            pages.append(page)
+            url = page['next']
+
+        minutes = [[row['consumedTime'] for row in page['results']] for page in pages]
+        self.assertEqual(minutes, [[70, 60, 50], [40, 30, 20], [10]])
+        self.assertEqual([page['total_minutes'] for page in pages], [180, 90, 10])
+
+    def test_unpaginated_list_keeps_the_old_shape(self):
+        rows = APIClient().get(f'/api/sessions/{self.student.studentID}/').json()
+
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0], {'date': '2024-08-01', 'loginTime': '08:00:00', 'logoutTime': '23:00:00', 'consumedTime': 10})
+
+    def test_kiosk_history_filters_by_date_range(self):
+        response = self.client.post('/api/check-history-student/', {
+            'studentID': self.student.studentID, 'start': '2024-08-02', 'end': '2024-08-07',
+            'paginate': 'true', 'page_size': 2,
+        })
+        page = response.json()
+
+        self.assertEqual([row['consumedTime'] for row in page['sessions']], [60, 50])
+        self.assertEqual(page['total_minutes'], 110)
+
+        page = self.client.post('/api/check-history-student/', {
+            'studentID': self.student.studentID, 'start': '2024-08-02', 'end': '2024-08-07', 'cursor': page['next'],
+        }).json()
+        self.assertEqual([row['consumedTime'] for row in page['sessions']], [40, 30])
+        self.assertIsNone(page['next'])
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.post('/api/check-history-student/', {'studentID': self.student.studentID, 'start': 'yesterday'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class DashboardCacheTests(SemesterSetupMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        get_current_semester()
+        self.client = APIClient()
+
+    def test_logout_moves_current_semester_to_a_new_version(self):
+        self.assertEqual(self.client.get('/api/session-hours/').json(), [])
+        with self.assertNumQueries(1):  # The semester's data version
+            self.client.get('/api/session-hours/')
+
+        start_session(self.student, datetime.now() - timedelta(minutes=30))
+        with self.captureOnCommitCallbacks(execute=True):
+            close_session(self.student.studentID, consumed_minutes=30)
+
+        hours = self.client.get('/api/session-hours/').json()
+        self.assertEqual([row['total_hours'] for row in hours], [0.5])
+
+        # The version lives in the database, so losing cache files to a cull
+        # can't move it back to a version with stale entries
+        cache.clear()
+        self.assertEqual(dashboard_cache.data_version('2024', 'firstsem'), 1)
+
+    def test_past_semester_is_served_from_cache(self):
+        MonthlyUsageRollup.objects.create(year='2023', semester_name='secondsem', month=2, course='BSIT', income=500)
+        params = {'year': '2023', 'semester_name': 'secondsem'}
+        self.client.get('/api/previous-income/', params)
+
+        with self.assertNumQueries(1):
+            income = self.client.get('/api/previous-income/', params).json()
+
+        self.assertEqual(income, [{'month': 'February', 'total_income': 500}])
+
+    def test_unknown_semester_is_not_cached(self):
+        params = {'year': 'not-a-year', 'semester_name': 'whatever'}
+        self.assertEqual(self.client.get('/api/previous-income/', params).json(), [])
+
+        self.assertIsNone(cache.get('dashboard:transaction-income:not-a-year:whatever:0'))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'total': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(dashboard_cache.cached('test', '2024', 'firstsem', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'total': 42}] * 8)
+
+
+class ConditionalGetTests(SemesterSetupMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        get_current_semester()
+        self.client = APIClient()
+
+    def test_unchanged_student_list_is_not_modified(self):
+        response = self.client.get('/api/students/')
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/students/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        credit_minutes(self.student, 30)
+        response = self.client.get('/api/students/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_closing_a_session_changes_the_session_list_etag(self):
+        start_session(self.student)
+        url = f'/api/sessions/{self.student.studentID}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        close_session(self.student.studentID, consumed_minutes=5)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_filters_get_their_own_etag(self):
+        all_students = self.client.get('/api/students/')['ETag']
+        bsit = self.client.get('/api/students/', {'course': 'BSIT'})['ETag']
+
+        self.assertNotEqual(all_students, bsit)
+
+
+class TransactionListTests(TestCase):
+    def setUp(self):
+        start_semester()
+        students = [
+            Student.objects.create(studentID=f'21-0000-{i:03d}', name=f'S{i}', course='BSIT', time_left=600, password='x')
+            for i in range(5)
+        ]
+        for i in range(60):
+            Transaction.objects.create(student=students[i % 5], reference_number=f'REF{i:04d}', amount=100)
+        get_current_semester()
+        self.client = APIClient()
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for page_size in (5, 50):
+            # ETag aggregate + the page, with the students joined in
+            with self.assertNumQueries(2):
+                page = self.client.get('/api/transactions/', {'paginate': 'true', 'page_size': page_size}).json()
+            self.assertEqual(len(page['results']), page_size)
+
+        with self.assertNumQueries(2):
+            rows = self.client.get('/api/transactions/').json()
+        self.assertEqual(len(rows), 60)
+        self.assertEqual(rows[0]['student_id'], '21-0000-000')
+
+    def test_filters(self):
+        by_student = self.client.get('/api/transactions/', {'student': '21-0000-002'}).json()
+        by_reference = self.client.get('/api/transactions/', {'reference': 'REF001'}).json()
+        today = timezone.localdate().isoformat()
+        in_range = self.client.get('/api/transactions/', {'start': today, 'end': today}).json()
+        before = self.client.get('/api/transactions/', {'end': '2000-01-01'}).json()
+
+        self.assertEqual({row['student_id'] for row in by_student}, {'21-0000-002'})
+        self.assertEqual(len(by_student), 12)
+        self.assertEqual(sorted(row['reference_number'] for row in by_reference), [f'REF001{i}' for i in range(10)])
+        self.assertEqual((len(in_range), before), (60, []))
+        self.assertEqual(self.client.get('/api/transactions/', {'start': 'soon'}).status_code, 400)
+
+
+class TransactionIdempotencyTests(SemesterSetupMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        # Cache the semester up front: a SELECT ahead of the INSERT in the
+        # create's transaction makes SQLite fail one of two upgrading writers
+        # outright instead of waiting
+        get_current_semester()
+
+    def submit_in_parallel(self, count, receipt=None, **headers):
+        responses = []
+
+        def submit(index):
+            try:
+                if receipt is None:
+                    responses.append(APIClient().post('/api/transactions/create/', {
+                        'reference_number': 'REF-1', 'student_id': '21-1234-567', 'hours': 2,
+                    }, format='json', headers=headers))
+                else:
+                    # The same screenshot behind different reference numbers
+                    responses.append(APIClient().post('/api/transactions/create/', {
+                        'reference_number': f'REF-{index}', 'student_id': '21-1234-567', 'hours': 2,
+                        'receipt': SimpleUploadedFile('receipt.jpg', receipt, content_type='image/jpeg'),
+                    }, format='multipart', headers=headers))
+            except Exception as e:
+                responses.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def test_parallel_duplicates_credit_once(self):
+        responses = self.submit_in_parallel(6)
+
+        self.assertEqual(sorted(r.status_code for r in responses), [201] + [400] * 5)
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(Student.objects.get().time_left, 600 + 120)
+
+    def test_parallel_retries_with_idempotency_key_get_the_original(self):
+        responses = self.submit_in_parallel(6, **{'Idempotency-Key': 'retry-1'})
+
+        self.assertEqual(sorted(r.status_code for r in responses), [200] * 5 + [201])
+        self.assertEqual({r.json()['id'] for r in responses}, {Transaction.objects.get().id})
+        self.assertEqual(Student.objects.get().time_left, 600 + 120)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp(), RECEIPT_WORKERS=0)
+    def test_parallel_uploads_of_one_receipt_credit_once(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 30), 'white').save(buffer, format='JPEG')
+
+        responses = self.submit_in_parallel(4, receipt=buffer.getvalue())
+
+        self.assertEqual(sorted(r.status_code for r in responses), [201] + [400] * 3)
+        self.assertEqual({r.json()['error'] for r in responses if r.status_code == 400}, {"This receipt has already been used"})
+        self.assertEqual(Student.objects.get().time_left, 600 + 120)
+
+    def test_idempotency_key_reused_for_another_transaction(self):
+        client = APIClient()
+        client.post('/api/transactions/create/', {'reference_number': 'REF-1', 'student_id': '21-1234-567', 'hours': 1},
+                    format='json', headers={'Idempotency-Key': 'k'})
+        response = client.post('/api/transactions/create/', {'reference_number': 'REF-2', 'student_id': '21-1234-567', 'hours': 1},
+                               format='json', headers={'Idempotency-Key': 'k'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), RECEIPT_WORKERS=0)
+class ReceiptProcessingTests(SemesterSetupMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def post(self, content, name='receipt.jpg', reference='REF-1'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/transactions/create/', {
+                'reference_number': reference, 'student_id': '21-1234-567', 'hours': 2,
+                'receipt': SimpleUploadedFile(name, content, content_type='image/jpeg'),
+            }, format='multipart')
+
+    def upload(self, content, name='receipt.jpg'):
+        response = self.post(content, name)
+        self.assertEqual(response.status_code, 201)
+        return Transaction.objects.get(pk=response.json()['id'])
+
+    def test_receipt_is_rotated_downscaled_and_stripped(self):
+        photo = Image.new('RGB', (3000, 2000), 'white')
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+        exif[0x010F] = 'PhoneMaker'
+        buffer = io.BytesIO()
+        photo.save(buffer, format='JPEG', exif=exif, quality=95)
+
+        payment = self.upload(buffer.getvalue())
+
+        with payment.receipt_image.open('rb') as fileobj, Image.open(fileobj) as receipt:
+            self.assertEqual(receipt.size, (1067, 1600))
+            self.assertEqual(dict(receipt.getexif()), {})
+        with payment.receipt_thumbnail.open('rb') as fileobj, Image.open(fileobj) as thumbnail:
+            self.assertLessEqual(max(thumbnail.size), 200)
+
+        row = self.client.get('/api/transactions/').json()[0]
+        self.assertTrue(row['receipt_thumbnail'].endswith('.jpg'))
+
+    def test_processing_changes_the_list_etag(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 300), 'white').save(buffer, format='JPEG')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post('/api/transactions/create/', {
+                'reference_number': 'REF-1', 'student_id': '21-1234-567', 'hours': 2,
+                'receipt': SimpleUploadedFile('receipt.jpg', buffer.getvalue(), content_type='image/jpeg'),
+            }, format='multipart')
+        before = self.client.get('/api/transactions/')
+        self.assertIsNone(before.json()[0]['receipt_thumbnail'])
+
+        for callback in callbacks:
+            callback()
+
+        after = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertTrue(after.json()[0]['receipt_thumbnail'].endswith('.jpg'))
+
+    def test_non_image_upload_is_left_alone(self):
+        with self.assertLogs('students.receipts', 'WARNING'):
+            payment = self.upload(b'not an image', name='receipt.pdf')
+
+        self.assertTrue(payment.receipt_image.name.endswith('.pdf'))
+        self.assertFalse(payment.receipt_thumbnail)
+
+    def test_identical_content_is_stored_once_under_its_hash(self):
+        storage = Transaction._meta.get_field('receipt_image').storage
+        first = storage.save('receipts/IMG_0001.JPG', ContentFile(b'same bytes'))
+        second = storage.save('receipts/screenshot.jpg', ContentFile(b'same bytes'))
+
+        sha256 = hashlib.sha256(b'same bytes').hexdigest()
+        self.assertEqual(first, f'receipts/{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg')
+        self.assertEqual(second, first)
+        with storage.open(first) as stored:
+            self.assertEqual(stored.read(), b'same bytes')
+
+    def test_downloaded_processed_receipt_is_rejected(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 300), 'white').save(buffer, format='JPEG', quality=95)
+        payment = self.upload(buffer.getvalue())
+        with payment.receipt_image.open('rb') as stored:
+            processed = stored.read()
+
+        response = self.post(processed, name='download.jpg', reference='REF-2')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "This receipt has already been used")
+
+    def test_resubmitted_receipt_is_rejected(self):
+        payment = self.upload(b'not an image', name='receipt.pdf')
+        self.assertEqual(payment.receipt_sha256, hashlib.sha256(b'not an image').hexdigest())
+
+        response = self.post(b'not an image', name='copy.pdf', reference='REF-2')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "This receipt has already been used")
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+class ActivityLogViewTests(TestCase):
+    def setUp(self):
+        start = timezone.make_aware(datetime(2024, 3, 1, 9, 0))
+        ActivityLog.objects.bulk_create([
+            ActivityLog(username='admin', action=f'{"Reset password" if i % 2 else "Topped up"} {i}', timestamp=start + timedelta(days=i))
+            for i in range(5)
+        ] + [ActivityLog(username='staff', action='Topped up', timestamp=start)])
+        self.client = APIClient()
+
+    def test_pages_newest_first(self):
+        with self.assertNumQueries(2):  # ETag aggregate + one page of rows
+            first = self.client.get('/api/logs/admin/', {'paginate': 'true', 'page_size': 3}).json()
+        self.assertEqual([log['action'] for log in first['results']], ['Topped up 4', 'Reset password 3', 'Topped up 2'])
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual([log['action'] for log in second['results']], ['Reset password 1', 'Topped up 0'])
+        self.assertIsNone(second['next'])
+
+    def test_pages_through_entries_sharing_a_timestamp(self):
+        burst = timezone.make_aware(datetime(2024, 3, 10, 9, 0))
+        ActivityLog.objects.bulk_create([ActivityLog(username='admin', action=f'Burst {i}', timestamp=burst) for i in range(5)])
+
+        actions, url = [], '/api/logs/admin/?paginate=true&page_size=2'
+        while url:
+            with self.assertNumQueries(2):
+                page = self.client.get(url).json()
+            actions += [log['action'] for log in page['results']]
+            url = page['next']
+        self.assertEqual(actions[:5], [f'Burst {i}' for i in range(4, -1, -1)])
+        self.assertEqual(len(actions), 10)
+
+        response = self.client.get('/api/logs/admin/', {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_late_flushed_entry_is_not_hidden_by_if_modified_since(self):
+        first = self.client.get('/api/logs/admin/')
+        self.assertNotIn('Last-Modified', first)
+
+        # A buffered entry reaches the table after the client's fetch
+        ActivityLog.objects.create(username='admin', action='Exported', timestamp=timezone.make_aware(datetime(2024, 3, 1, 9, 0)))
+        response = self.client.get('/api/logs/admin/', headers={'If-Modified-Since': 'Sat, 01 Jan 2030 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/logs/admin/', headers={'If-None-Match': first['ETag']}).status_code, 200)
+
+    def test_action_and_date_filters(self):
+        logs = self.client.get('/api/logs/admin/', {'action': 'reset', 'start': '2024-03-03'}).json()
+        self.assertEqual([log['action'] for log in logs], ['Reset password 3'])
+
+        response = self.client.get('/api/logs/admin/', {'start': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_user_without_logs(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/logs/nobody/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ActivityLogBufferTests(TransactionTestCase):
+    def wait_for_rows(self, count):
+        deadline = time.monotonic() + 5
+        while ActivityLog.objects.count() < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return ActivityLog.objects.count()
+
+    def test_full_batch_is_written_by_the_background_thread(self):
+        buffer = activity_log.LogBuffer(batch_size=3, interval=60)
+        for i in range(2):
+            buffer.add(ActivityLog(username='staff', action=f'Action {i}', timestamp=timezone.now()))
+        self.assertEqual(ActivityLog.objects.count(), 0)
+
+        buffer.add(ActivityLog(username='staff', action='Action 2', timestamp=timezone.now()))
+        self.assertEqual(self.wait_for_rows(3), 3)
+        buffer.stop()
+
+    def test_stop_writes_what_is_left(self):
+        buffer = activity_log.LogBuffer(batch_size=100, interval=60)
+        buffer.add(ActivityLog(username='staff', action='Reset password', timestamp=timezone.now()))
+        buffer.stop()
+
+        self.assertEqual(ActivityLog.objects.get().action, 'Reset password')
+
+    def test_failed_batch_is_retried(self):
+        buffer = activity_log.LogBuffer(batch_size=100, interval=60)
+        buffer.add(ActivityLog(username='staff', action='Reset password', timestamp=timezone.now()))
+        with mock.patch.object(ActivityLog.objects, 'bulk_create', side_effect=OperationalError('gone away')):
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+        buffer.add(ActivityLog(username='staff', action='Exported', timestamp=timezone.now()))
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(list(ActivityLog.objects.order_by('id').values_list('action', flat=True)), ['Reset password', 'Exported'])
+        buffer.stop()
+
+    def test_buffer_drops_oldest_entries_when_full(self):
+        buffer = activity_log.LogBuffer(batch_size=100, interval=60, max_buffered=2)
+        with self.assertLogs('students.activity_log', 'WARNING'):
+            for i in range(3):
+                buffer.add(ActivityLog(username='staff', action=f'Action {i}', timestamp=timezone.now()))
+        buffer.stop()
+
+        self.assertEqual(sorted(ActivityLog.objects.values_list('action', flat=True)), ['Action 1', 'Action 2'])
+
+    def test_staff_login_is_buffered(self):
+        staff = Staff.objects.create(username='admin', name='Admin')
+
+        log_staff_activity(staff, 'Logged in')
+        self.assertFalse(StaffActivityLog.objects.exists())
+
+        activity_log.flush()
+        self.assertEqual(StaffActivityLog.objects.get().action, 'Logged in')
+
+    @override_settings(ACTIVITY_LOG_BUFFERED=False)
+    def test_synchronous_fallback(self):
+        response = APIClient().post('/api/activity-logs/', {'username': 'staff', 'action': 'Exported'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ActivityLog.objects.get().username, 'staff')
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StudentViewSet, TransactionCreateView, TransactionListView, ResetPasswordView, UserLoginView, LogoutView, student_login_view, student_logout_view, student_change_password_view, check_history_view, export_to_excel, StaffCreateView, StaffListView, UpdateStaffStatusView, ImportStudentView, SessionListByStudentID, StaffLogsView, log_activity, ActivityLogView, StudentUpdateView, ChangePasswordView, SemesterUpsertView, SessionHoursView, CountLoggedInView, ActiveUsersCountView, PaymentIncomeView, CoursesCountView, PreviousCoursesCountView, PreviousSessionHoursView, PreviousPaymentIncomeView
+from .views import StudentViewSet, TransactionCreateView, TransactionListView, ResetPasswordView, BulkResetPasswordView, UserLoginView, LogoutView, student_login_view, student_logout_view, student_change_password_view, check_history_view, kiosk_events_view, export_to_excel, StaffCreateView, StaffListView, UpdateStaffStatusView, ImportStudentView, SessionListByStudentID, StaffLogsView, log_activity, ActivityLogView, StudentUpdateView, ChangePasswordView, SemesterUpsertView, SessionHoursView, CountLoggedInView, OnlineStudentsView, ActiveUsersCountView, PaymentIncomeView, CoursesCountView, PreviousCoursesCountView, PreviousSessionHoursView, PreviousPaymentIncomeView, ExportJobView, ExportJobStatusView, ExportJobDownloadView
 
 router = DefaultRouter()
 router.register(r'students', StudentViewSet, basename='student')
@@ -12,9 +12,11 @@ urlpatterns = [
     path('logout-student/', student_logout_view, name='logout-student'),
     path('change-password-student/', student_change_password_view, name='change-password-student'),
     path('check-history-student/', check_history_view, name='check-history-student'),
+    path('kiosk-events/', kiosk_events_view, name='kiosk-events'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('transactions/', TransactionListView.as_view(), name='transaction-list'),
     path('transactions/create/', TransactionCreateView.as_view(), name='transaction-create'),
+    path('students/bulk/reset-password/', BulkResetPasswordView.as_view(), name='bulk-reset-password'),
     path('students/<str:studentID>/reset-password/', ResetPasswordView.as_view(), name='reset-password'),
     path('create-user/', StaffCreateView.as_view(), name='create_user'),
     path('staffview/', StaffListView.as_view(), name='staff-list'),
@@ -26,6 +28,7 @@ urlpatterns = [
     path('semesters/', SemesterUpsertView.as_view(), name='semester-create'),
     path('session-hours/', SessionHoursView.as_view(), name='session-hours'),
     path('count_loggedin/', CountLoggedInView.as_view(), name='count_loggedin'),
+    path('online/', OnlineStudentsView.as_view(), name='online-students'),
     path('active_users/', ActiveUsersCountView.as_view(), name='active_users_count'), 
     path('transaction-income/', PaymentIncomeView.as_view(), name='transaction-income'), 
     path('courses-count/', CoursesCountView.as_view(), name='courses-count'), 
@@ -35,6 +38,9 @@ urlpatterns = [
     path('previous-session/', PreviousSessionHoursView.as_view(), name='previous-session'),
     path('previous-income/', PreviousPaymentIncomeView.as_view(), name='previous-income'),
     path('export/', export_to_excel, name='export-to-excel'),
+    path('export/jobs/', ExportJobView.as_view(), name='export-jobs'),
+    path('export/jobs/<str:job_id>/', ExportJobStatusView.as_view(), name='export-job-status'),
+    path('export/jobs/<str:job_id>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
 
     
 ]
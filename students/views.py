@@ -1,8 +1,26 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from .models import Student, Transaction, Staff, Session, Semester, StaffActivityLog, ActivityLog, log_staff_activity
-from .serializers import StudentSerializer, TransactionSerializer, StaffSerializer, UserLoginSerializer, StaffLoginSerializer, StaffUserSerializer, StaffStatusSerializer, SessionSerializer, StaffActivityLogSerializer, ActivityLogSerializer, StudentTypeSerializer, ChangePasswordSerializer, SemesterSerializer, SessionHoursSerializer, PaymentIncomeSerializer
+from .models import Student, Transaction, Staff, Session, Semester, ActivityLog, log_staff_activity
+from .semester import get_current_semester, invalidate_current_semester
+from .rollups import record_transaction
+from .accounting import close_session, credit_minutes, start_session
+from .kiosk_events import apply_events
+from .analytics import count_active_users, course_counts_by_month, income_by_month, session_hours_by_month
+from . import activity_log, dashboard_cache
+from .exports import XLSX_CONTENT_TYPE, export_filename
+from .imports import import_students
+from .hashing import hash_passwords
+from .receipts import discard_receipt, schedule_receipt_processing
+from .storage import file_sha256
+from .rollover import rollover_students
+from .pagination import ActivityLogCursorPagination, OptInPaginationMixin, StudentCursorPagination, TransactionCursorPagination, paginate_requested, wants_pagination
+from .filters import filter_day_range, parse_date_range
+from . import history
+from .conditional import conditional_list
+from . import presence
+from .export_jobs import build_artifact, get_job as get_export_job, job_artifact, semester_watermark, start_export
+from .serializers import StudentSerializer, TransactionSerializer, StaffSerializer, UserLoginSerializer, StaffLoginSerializer, StaffUserSerializer, StaffStatusSerializer, SessionSerializer, StaffActivityLogSerializer, ActivityLogSerializer, StudentTypeSerializer, ChangePasswordSerializer, SemesterSerializer, SessionHoursSerializer, PaymentIncomeSerializer, KioskEventSerializer
 from rest_framework.views import APIView
 from rest_framework import generics, viewsets
 from django.conf import settings 
@@ -21,19 +39,62 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime, date, time, timedelta
 from datetime import datetime
-from django.db.models import Sum
-from django.db.models.functions import ExtractMonth
-from django.db.models import Count
-import openpyxl
-from django.http import HttpResponse
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, Q
+from django.http import HttpResponse, FileResponse
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
 
-class StudentViewSet(ModelViewSet):
+class StudentViewSet(OptInPaginationMixin, ModelViewSet):
     
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     lookup_field = 'studentID'  # Use studentID as the lookup field instead of pk
+    pagination_class = StudentCursorPagination  # Only with ?paginate=true (see pagination.py)
+    filter_params = ['status', 'course']
+
+    def requested_fields(self):
+        # ?fields=studentID,name narrows both the SELECT and the output
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+        readable = [name for name, field in StudentSerializer().fields.items() if not field.write_only]
+        return [name for name in fields.split(',') if name in readable] or None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+
+        params = self.request.query_params
+        for param in self.filter_params:
+            if params.get(param):
+                queryset = queryset.filter(**{param: params[param]})
+        if params.get('is_logged_in'):
+            queryset = queryset.filter(is_logged_in=params['is_logged_in'].lower() in ('1', 'true', 'yes'))
+
+        fields = self.requested_fields()
+        if fields:
+            return queryset.only('id', *fields)
+        return queryset.defer('password')  # never sent to clients
+
+    def list(self, request, *args, **kwargs):
+        # 304 when nothing in the (filtered) list changed, see conditional.py
+        queryset = self.filter_queryset(self.get_queryset())
+        return conditional_list(request, queryset, lambda: super(StudentViewSet, self).list(request, *args, **kwargs), 'updated_at')
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # Staff can log a student out from the student list
+        if serializer.validated_data.get('is_logged_in') is False:
+            presence.mark_offline(serializer.instance.studentID)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'list':
+            kwargs.setdefault('fields', self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
 
     def get_object(self):
         student_id = self.kwargs['studentID']
@@ -61,6 +122,7 @@ class ResetPasswordView(APIView):
             student.password = make_password(default_password)
             student.is_logged_in = False
             student.save()
+            presence.mark_offline(student.studentID)
 
             # Log the password reset action
             staff_username = request.user.username  # The username of the staff performing the reset
@@ -81,7 +143,50 @@ class ResetPasswordView(APIView):
             logger.error(f"An error occurred: {str(e)}")
             return Response({"error": "An internal error occurred."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    
+
+
+class BulkResetPasswordView(APIView):
+
+    def post(self, request):
+        # Reset many students to the default password at once, e.g. a new
+        # intake. Hashing runs in parallel on the hashing pool and the hashes
+        # are written back in batches.
+        student_ids = request.data.get('studentIDs')
+        student_status = request.data.get('status')
+
+        if student_ids is not None:
+            if not isinstance(student_ids, list):
+                return Response({"error": "studentIDs must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+            students = Student.objects.filter(studentID__in=student_ids)
+        elif student_status:
+            students = Student.objects.filter(status=student_status)
+        else:
+            return Response({"error": "Provide studentIDs or status."}, status=status.HTTP_400_BAD_REQUEST)
+
+        students = list(students.only('id', 'studentID'))
+        hashes = hash_passwords(['123456'] * len(students))
+        now = timezone.now()
+        for student, hashed in zip(students, hashes):
+            student.password = hashed
+            student.is_logged_in = False
+            student.updated_at = now
+
+        with db_transaction.atomic():
+            Student.objects.bulk_update(students, ['password', 'is_logged_in', 'updated_at'], batch_size=500)
+            presence.mark_offline(*(student.studentID for student in students))
+
+        found = {student.studentID for student in students}
+        not_found = [student_id for student_id in (student_ids or []) if student_id not in found]
+
+        if request.user.is_authenticated:
+            activity_log.log_action(request.user.username, f"Reset password for {len(students)} students")
+
+        return Response({
+            "message": "Password reset successful.",
+            "reset": len(students),
+            "not_found": not_found,
+        }, status=status.HTTP_200_OK)
+
 
 class TransactionCreateView(APIView):
     
@@ -96,45 +201,114 @@ class TransactionCreateView(APIView):
         if not reference_number or not student_id or not hours_to_add:
             return Response({"error": "Reference number, hours, and student ID are required"}, status=status.HTTP_400_BAD_REQUEST)
 
+        # A retry of a request that already went through gets its transaction back
+        idempotency_key = request.headers.get('Idempotency-Key') or None
+        if idempotency_key:
+            replay = self.replay(idempotency_key, reference_number, student_id)
+            if replay:
+                return replay
+
         # Check if the student exists
         try:
             student = Student.objects.get(studentID=student_id)
         except Student.DoesNotExist:
             return Response({"error": "Student not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Check if the reference number has already been used
-        if Transaction.objects.filter(reference_number=reference_number).exists():
-            return Response({"error": "This reference number has already been used"}, status=status.HTTP_400_BAD_REQUEST)
+        # The same receipt can't pay for two top-ups, whether it is the
+        # original upload or the processed copy downloaded again. The unique
+        # receipt_sha256 settles a race between two uploads below.
+        receipt_sha256 = file_sha256(receipt_image) if receipt_image else None
+        if receipt_sha256 and self.receipt_used(receipt_sha256):
+            return Response({"error": "This receipt has already been used"}, status=status.HTTP_400_BAD_REQUEST)
 
          # Calculate amount based on hours_to_add
         amount = int(hours_to_add) * 15  # 15 for each hour (1 hour -> 15, 2 hours -> 30, etc.)
 
-        # Create a new transaction
-        transaction = Transaction.objects.create(
+        # The unique reference_number (and idempotency_key) decide which of
+        # two concurrent submissions wins; the loser rolls back entirely,
+        # credit included
+        transaction = Transaction(
             student=student,
             reference_number=reference_number,
+            idempotency_key=idempotency_key,
             receipt_image=receipt_image,  # Save the image file in the transaction
+            receipt_sha256=receipt_sha256,
             amount = amount
         )
-
-        # Update student's time_left (convert hours to minutes and add)
-        student.time_left += int(hours_to_add) * 60  # Adding hours in minutes
-        student.save()
+        try:
+            with db_transaction.atomic():
+                # Create a new transaction
+                transaction.save(force_insert=True)
+                record_transaction(transaction)
+
+                # Update student's time_left (convert hours to minutes and add)
+                credit_minutes(student, int(hours_to_add) * 60)
+
+                # Downscale the photo and make its thumbnail off the request
+                if receipt_image:
+                    schedule_receipt_processing(transaction.pk)
+        except IntegrityError:
+            if receipt_image:
+                discard_receipt(transaction.receipt_image.name)  # Stored before the insert failed
+            if idempotency_key:
+                replay = self.replay(idempotency_key, reference_number, student_id)
+                if replay:
+                    return replay
+            if receipt_sha256 and self.receipt_used(receipt_sha256):
+                return Response({"error": "This receipt has already been used"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"error": "This reference number has already been used"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Serialize and return the created transaction
         serializer = TransactionSerializer(transaction)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def receipt_used(self, receipt_sha256):
+        return Transaction.objects.filter(Q(receipt_sha256=receipt_sha256) | Q(processed_sha256=receipt_sha256)).exists()
+
+    def replay(self, idempotency_key, reference_number, student_id):
+        """The response for a key that was already used, or None if it wasn't."""
+        original = Transaction.objects.select_related('student').filter(idempotency_key=idempotency_key).first()
+        if original is None:
+            return None
+        if original.reference_number != reference_number or original.student.studentID != student_id:
+            return Response({"error": "This Idempotency-Key was already used for a different transaction"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TransactionSerializer(original).data, status=status.HTTP_200_OK)
     
 
-class TransactionListView(generics.ListAPIView):
+class TransactionListView(OptInPaginationMixin, generics.ListAPIView):
     serializer_class = TransactionSerializer
+    pagination_class = TransactionCursorPagination  # Only with ?paginate=true (see pagination.py)
 
     def get_queryset(self):
         # Retrieve the active semester (or filter based on your needs)
-        sem = Semester.objects.first()  # Or use a filter to get the active semester
+        sem = get_current_semester()  # Cached active semester (see semester.py)
         
-        # Filter transactions by semester name and year
-        return Transaction.objects.filter(semester_name=sem.semester_name, year=sem.year)
+        # Filter transactions by semester name and year; the student is
+        # joined in for student_id instead of fetched once per row
+        queryset = (
+            Transaction.objects
+            .filter(semester_name=sem.semester_name, year=sem.year)
+            .select_related('student')
+            .defer('student__password')
+        )
+
+        # ?start=&end= (dates), ?student=<studentID>, ?reference=<prefix>
+        params = self.request.query_params
+        try:
+            start, end = parse_date_range(params)
+        except ValueError as e:
+            raise ValidationError({"error": str(e)})
+        queryset = filter_day_range(queryset, 'timestamp', start, end)
+        if params.get('student'):
+            queryset = queryset.filter(student__studentID=params['student'])
+        if params.get('reference'):
+            queryset = queryset.filter(reference_number__startswith=params['reference'])
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # Count and last id catch added rows; updated_at also moves when a
+        # receipt is processed after the transaction was created
+        return conditional_list(request, self.get_queryset(), lambda: super(TransactionListView, self).list(request, *args, **kwargs), 'updated_at')
 
 @csrf_exempt
 def student_login_view(request):
@@ -156,17 +330,13 @@ def student_login_view(request):
                 return JsonResponse({"error": "Your session has expired. Please contact the staff to request additional time."}, status=400)
             
 
-            student.is_logged_in = True
-            student.save()
+            # Conditional UPDATE: if another kiosk logged this student in since
+            # the checks above, only one of them gets the session
+            kiosk = request.POST.get('kiosk') or request.META.get('REMOTE_ADDR', '')
+            if start_session(student, kiosk=kiosk) is None:
+                return JsonResponse({"error": "Already logged in"}, status=400)
             time_left = student.time_left
 
-            Session.objects.create(
-                date=date.today(),
-                loginTime=datetime.now().time(),
-                parent=student,
-                course=student.course
-            )
-
             response_data = {
                 "message": "Login successful",
                 "time_left": time_left,  # Return time left as number of seconds
@@ -182,47 +352,18 @@ def student_logout_view(request):
     if request.method == "POST":
         studentID = request.POST.get('studentID')
 
-        try:
-            student = Student.objects.get(studentID=studentID)
-
-            if not student.is_logged_in:
+        # One conditional UPDATE each for the session and the student's
+        # balance, so a concurrent top-up is never overwritten (see accounting.py)
+        session = close_session(studentID)
+        if session is None:
+            student = Student.objects.filter(studentID=studentID).values('is_logged_in').first()
+            if student is None:
+                return JsonResponse({"error": "Invalid StudentID"}, status=400)
+            if not student['is_logged_in']:
                 return JsonResponse({"error": "User is not logged in"}, status=400)
+            return JsonResponse({"error": "No active session found"}, status=400)
 
-            # Get the active session
-            session = Session.objects.filter(parent=student, logoutTime__isnull=True).first()
-
-            if not session:
-                return JsonResponse({"error": "No active session found"}, status=400)
-
-            # Set logoutTime
-            logout_time = datetime.now().time()
-            session.logoutTime = logout_time
-
-            # Calculate consumedTime (difference between loginTime and logoutTime)
-            logout_time = datetime.now()
-            login_time = session.loginTime
-            login_time = datetime.combine(datetime.today(), login_time)
-            consumed_time = logout_time - login_time
-            print("Consumed Time: ", consumed_time)
-
-            # Calculate hours, minutes, and seconds from the timedelta
-            hours = consumed_time.seconds // 3600
-            minutes = (consumed_time.seconds % 3600) // 60
-
-            hours *= 60
-            consumed_time_as_time = hours + minutes
-            session.consumedTime = consumed_time_as_time
-            session.save()
-
-            # Mark the student as logged out
-            student.is_logged_in = False
-            student.time_left -= consumed_time_as_time
-            student.save()
-
-            return JsonResponse({"message": "Logout successful"})
-
-        except Student.DoesNotExist:
-            return JsonResponse({"error": "Invalid StudentID"}, status=400)
+        return JsonResponse({"message": "Logout successful"})
 
     return JsonResponse({"error": "Invalid request method"}, status=405)
 
@@ -246,29 +387,43 @@ def student_change_password_view(request):
 def check_history_view(request):
     if request.method == "POST":
         studentID = request.POST.get('studentID')
-        semester = Semester.objects.first()
-        year = semester.year
-        sem = semester.semester_name
-        sessions = Session.objects.filter(parent_id=studentID, semester_name=sem, year=year)
-        session_data = []
-
-        for session in sessions:
-            try:
-                session_data.append({
-                    "date": session.date,  # Assuming date stored as expire_date
-                    "loginTime": session.loginTime,
-                    "logoutTime": session.logoutTime or "N/A",
-                    "consumedTime": session.consumedTime,
-                })
-            except AttributeError as e:
-                # Handle missing fields or model errors gracefully.
-                session_data.append({"error": f"Session data error: {e}"})
-
-        return JsonResponse({"sessions": session_data})
+        try:
+            start, end, cursor, page_size = history.parse_params(request.POST)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        sessions = history.semester_sessions(studentID, get_current_semester(), start, end)
+
+        # Only paginate when asked (paginate=true or a cursor), so older
+        # kiosks still get the full list
+        if paginate_requested(request.POST):
+            rows, next_cursor, total_minutes = history.history_page(sessions, cursor, page_size)
+        else:
+            rows, next_cursor, total_minutes = sessions.values(*history.FIELDS), None, None
+
+        session_data = [
+            {
+                "date": row['date'],
+                "loginTime": row['loginTime'],
+                "logoutTime": row['logoutTime'] or "N/A",
+                "consumedTime": row['consumedTime'],
+            }
+            for row in rows
+        ]
+        if total_minutes is None:
+            return JsonResponse({"sessions": session_data})
+        return JsonResponse({"sessions": session_data, "next": next_cursor, "total_minutes": total_minutes})
 
     return JsonResponse({"error": "Invalid request method"}, status=405)
 
 
+@api_view(['POST'])
+def kiosk_events_view(request):
+    # Batches from a kiosk's offline journal; resending a batch is harmless
+    kiosk = request.data.get('kiosk') or request.META.get('REMOTE_ADDR', '')
+    serializer = KioskEventSerializer(data=request.data.get('events', []), many=True)
+    serializer.is_valid(raise_exception=True)
+    return Response({"accepted": apply_events(kiosk, serializer.validated_data)})
+
     
 class UserLoginView(generics.GenericAPIView):
     serializer_class = UserLoginSerializer
@@ -355,20 +510,11 @@ class ImportStudentView(APIView):
         if not isinstance(student_data, list):
             return Response({"error": "Invalid data format. Expected a list."}, status=status.HTTP_400_BAD_REQUEST)
 
-        inserted_students = []
-        duplicate_students = []
-
-        for student_info in student_data:
-            # Check if the student already exists based on studentID
-            if Student.objects.filter(studentID=student_info.get('studentID')).exists():
-                duplicate_students.append(student_info)  # Track duplicate records
-            else:
-                serializer = StudentSerializer(data=student_info)
-                if serializer.is_valid():
-                    serializer.save()
-                    inserted_students.append(serializer.data)  # Track inserted records
-                else:
-                    return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        # Duplicates are found with one lookup per chunk and the new rows are
+        # bulk inserted in a single transaction (see imports.py)
+        inserted_students, duplicate_students, errors = import_students(student_data)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
 
         # Construct response messages
         response_message = {
@@ -383,12 +529,45 @@ class ImportStudentView(APIView):
 class SessionListByStudentID(generics.ListAPIView):
     serializer_class = SessionSerializer
 
-    def get_queryset(self):
-        studentID = self.kwargs['studentID']
-        sem = Semester.objects.first()
-        
+    def get_queryset(self, start=None, end=None):
         # Filter sessions based on the foreign key's studentID
-        return Session.objects.filter(parent_id=studentID, semester_name=sem.semester_name, year=sem.year)
+        return history.semester_sessions(self.kwargs['studentID'], get_current_semester(), start, end)
+
+    def list(self, request, *args, **kwargs):
+        # Rows come straight from values(), formatted like SessionSerializer
+        try:
+            start, end, cursor, page_size = history.parse_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        sessions = self.get_queryset(start, end)
+        # Sessions only change when they close, which Count('logoutTime') sees
+        return conditional_list(
+            request, sessions, lambda: self.render_sessions(request, sessions, cursor, page_size),
+            closed=Count('logoutTime'),
+        )
+
+    def render_sessions(self, request, sessions, cursor, page_size):
+        if not wants_pagination(request):
+            return Response([self.session_row(row) for row in sessions.values(*history.FIELDS)])
+
+        rows, next_cursor, total_minutes = history.history_page(sessions, cursor, page_size)
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+        return Response({
+            "next": next_url,
+            "total_minutes": total_minutes,
+            "results": [self.session_row(row) for row in rows],
+        })
+
+    @staticmethod
+    def session_row(row):
+        return {
+            'date': row['date'].isoformat(),
+            'loginTime': row['loginTime'].strftime('%H:%M:%S') if row['loginTime'] else None,
+            'logoutTime': row['logoutTime'].strftime('%H:%M:%S') if row['logoutTime'] else None,
+            'consumedTime': row['consumedTime'],
+        }
     
 class StudentUpdateView(generics.UpdateAPIView):
     queryset = Student.objects.all()
@@ -434,7 +613,7 @@ class ChangePasswordView(generics.UpdateAPIView):
 
 class SemesterUpsertView(APIView):
     def put(self, request, *args, **kwargs):
-        # Check if a semester entry exists
+        # Check if a semester entry exists (read from the DB, not the cache, since we write it)
         semester = Semester.objects.first()
         
         # If no semester exists, create a new one
@@ -442,26 +621,26 @@ class SemesterUpsertView(APIView):
             serializer = SemesterSerializer(data=request.data)
             if serializer.is_valid():
                 serializer.save()
+                invalidate_current_semester()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         # If semester exists, update the existing record
+        previous_year, previous_semester_name = semester.year, semester.semester_name
         serializer = SemesterSerializer(semester, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            students = Student.objects.all()
-            for student in students:
-                if student.status == 'Alumnus':
-                    student.time_left = 0
-                elif student.status == 'Student':
-                    student.time_left = 600
-                student.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            invalidate_current_semester()
+            # Snapshot the old balances and reset time_left with chunked
+            # set-based UPDATEs (see rollover.py)
+            summary = rollover_students(previous_year, previous_semester_name)
+            logger.info(f"Semester rollover from {previous_year} {previous_semester_name}: {summary}")
+            return Response({**serializer.data, "rollover": summary}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def get(self, request):
         # Get the first semester record
-        semester = Semester.objects.first()
+        semester = get_current_semester()
         if semester:
             # Mapping semester_name to a formatted string
             semester_name_mapping = {
@@ -485,25 +664,13 @@ class SemesterUpsertView(APIView):
 class SessionHoursView(APIView):
     def get(self, request):
         # Get the current semester and year
-        current_semester = Semester.objects.first()
+        current_semester = get_current_semester()
         if not current_semester:
             return Response({"error": "Semester data not found"}, status=404)
 
-        # Aggregate the consumedTime by month and convert to hours
-        session_data = (
-            Session.objects
-            .filter(year=current_semester.year, semester_name=current_semester.semester_name)
-            .annotate(month=ExtractMonth('date'))
-            .values('month')
-            .annotate(total_minutes=Sum('consumedTime'))
-            .order_by('month')
-        )
-
-        # Convert minutes to hours and prepare data for serialization
-        data = [
-            {"month": datetime(2023, item['month'], 1).strftime('%B'), "total_hours": item['total_minutes'] / 60}
-            for item in session_data
-        ]
+        # Hours used per month, cached until the semester's data changes
+        year, semester_name = current_semester.year, current_semester.semester_name
+        data = dashboard_cache.cached('session-hours', year, semester_name, lambda: session_hours_by_month(year, semester_name))
 
         serializer = SessionHoursSerializer(data, many=True)
         return Response(serializer.data)
@@ -519,21 +686,7 @@ class PreviousSessionHoursView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Aggregate the consumedTime by month and convert to hours
-        session_data = (
-            Session.objects
-            .filter(year=year, semester_name=semester_name)
-            .annotate(month=ExtractMonth('date'))
-            .values('month')
-            .annotate(total_minutes=Sum('consumedTime'))
-            .order_by('month')
-        )
-
-        # Convert minutes to hours and prepare data for serialization
-        data = [
-            {"month": datetime(2023, item['month'], 1).strftime('%B'), "total_hours": item['total_minutes'] / 60}
-            for item in session_data
-        ]
+        data = dashboard_cache.cached('session-hours', year, semester_name, lambda: session_hours_by_month(year, semester_name))
 
         serializer = SessionHoursSerializer(data, many=True)
         return Response(serializer.data)
@@ -541,26 +694,12 @@ class PreviousSessionHoursView(APIView):
 
 class PaymentIncomeView(APIView):
     def get(self, request):
-        current_sem = Semester.objects.first()
+        current_sem = get_current_semester()
         if not current_sem:
             return Response({"error": "Semester data not found"}, status=404)
         
-        session_data = (
-            Transaction.objects
-            .filter(year=current_sem.year, semester_name=current_sem.semester_name)
-            .annotate(month=ExtractMonth('timestamp'))
-            .values('month')
-            .annotate(total_income=Sum('amount'))
-            .order_by('month')
-        )
-         # Convert minutes to hours and prepare data for serialization
-        data = [
-            {
-             "month": datetime(2023, item['month'], 1).strftime('%B'), 
-             "total_income": item['total_income'],
-             }
-            for item in session_data
-        ]
+        year, semester_name = current_sem.year, current_sem.semester_name
+        data = dashboard_cache.cached('transaction-income', year, semester_name, lambda: income_by_month(year, semester_name))
         serializer = PaymentIncomeSerializer(data, many=True)
         return Response(serializer.data)
     
@@ -577,47 +716,35 @@ class PreviousPaymentIncomeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        session_data = (
-            Transaction.objects
-            .filter(year=year, semester_name=semester_name)
-            .annotate(month=ExtractMonth('timestamp'))
-            .values('month')
-            .annotate(total_income=Sum('amount'))
-            .order_by('month')
-        )
-         # Convert minutes to hours and prepare data for serialization
-        data = [
-            {
-             "month": datetime(2023, item['month'], 1).strftime('%B'), 
-             "total_income": item['total_income'],
-             }
-            for item in session_data
-        ]
+        data = dashboard_cache.cached('transaction-income', year, semester_name, lambda: income_by_month(year, semester_name))
         serializer = PaymentIncomeSerializer(data, many=True)
         return Response(serializer.data)
     
 class CountLoggedInView(APIView):
     def get(self, request):
-        # Count the number of records where is_loggedin is True
-        logged_in_count = Student.objects.filter(is_logged_in=True).count()
+        # Live counts from the presence registry (no database query),
+        # overall and broken down by course and kiosk
+        return Response(presence.counts(), status=status.HTTP_200_OK)
+
 
-        # Send the count as a response
-        return Response({"logged_in_count": logged_in_count}, status=status.HTTP_200_OK)
+class OnlineStudentsView(APIView):
+    def get(self, request):
+        # Who is in the lab right now, from the presence registry
+        students = presence.online_students()
+        return Response({"count": len(students), "students": students}, status=status.HTTP_200_OK)
     
 class ActiveUsersCountView(APIView):
     def get(self, request):
         # Get the current semester details
-        current_semester = Semester.objects.first()
+        current_semester = get_current_semester()
         
         if current_semester:
-            current_year = current_semester.year
-            current_semester_name = current_semester.semester_name
+            year, semester_name = current_semester.year, current_semester.semester_name
             
-            # Filter sessions by the current year and semester, only where is_loggedin=True
-            active_users_count = Session.objects.filter(
-                year=current_year, 
-                semester_name=current_semester_name,
-            ).values('parent_id').distinct().count()
+            # Students with a session this semester. Cached like the other
+            # dashboard figures, so a first-ever login shows up with the
+            # next logout or payment (or when the entry expires).
+            active_users_count = dashboard_cache.cached('active-users', year, semester_name, lambda: count_active_users(year, semester_name))
             
             return Response({"active_users_count": active_users_count}, status=status.HTTP_200_OK)
         else:
@@ -625,35 +752,13 @@ class ActiveUsersCountView(APIView):
         
 class CoursesCountView(APIView):
     def get(self, request):
-        current_semester = Semester.objects.first()
+        current_semester = get_current_semester()
 
         if not current_semester:
             return Response({"error": "Semester data not found"}, status=404)
 
-        courses = Session.objects.filter(
-            year=current_semester.year,
-            semester_name=current_semester.semester_name
-        ).values_list('course', flat=True).distinct()
-
-        session_data = {}
-        for course in courses:
-            course_data = (
-                Session.objects
-                .filter(year=current_semester.year, semester_name=current_semester.semester_name, course=course)
-                .annotate(month=ExtractMonth('date'))
-                .values('month')
-                .annotate(count=Count('id'))
-                .order_by('month')
-            )
-            # Format course data by month
-            session_data[course] = [
-                {
-                    "month": datetime(2023, item['month'], 1).strftime('%B'), 
-                    "count": item['count']
-                }
-                for item in course_data
-            ]
-
+        year, semester_name = current_semester.year, current_semester.semester_name
+        session_data = dashboard_cache.cached('courses-count', year, semester_name, lambda: course_counts_by_month(year, semester_name))
         return Response({"data": session_data})
 
 class PreviousCoursesCountView(APIView):
@@ -667,47 +772,42 @@ class PreviousCoursesCountView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        courses = Session.objects.filter(
-            year=year,
-            semester_name=semester_name
-        ).values_list('course', flat=True).distinct()
-
-        session_data = {}
-        for course in courses:
-            course_data = (
-                Session.objects
-                .filter(year=year, semester_name=semester_name, course=course)
-                .annotate(month=ExtractMonth('date'))
-                .values('month')
-                .annotate(count=Count('id'))
-                .order_by('month')
-            )
-            # Format course data by month
-            session_data[course] = [
-                {
-                    "month": datetime(2023, item['month'], 1).strftime('%B'), 
-                    "count": item['count']
-                }
-                for item in course_data
-            ]
-
+        session_data = dashboard_cache.cached('courses-count', year, semester_name, lambda: course_counts_by_month(year, semester_name))
         return Response({"data": session_data})
     
 
-class ActivityLogView(APIView):
-    def get(self, request, username):
-        try:
-            logs = ActivityLog.objects.filter(username=username).order_by('-timestamp')
-
-            if not logs.exists():
-                return Response({'message': 'No logs found for this user.'}, status=status.HTTP_404_NOT_FOUND)
+class ActivityLogView(OptInPaginationMixin, generics.ListAPIView):
+    serializer_class = ActivityLogSerializer
+    pagination_class = ActivityLogCursorPagination  # Only with ?paginate=true (see pagination.py)
 
-            serializer = ActivityLogSerializer(logs, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Exception as e:
-            logger.error(f"Error fetching logs for {username}: {str(e)}")
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    def get_queryset(self):
+        logs = ActivityLog.objects.filter(username=self.kwargs['username'])
 
+        # ?start=&end= (dates), ?action=<substring>
+        params = self.request.query_params
+        try:
+            start, end = parse_date_range(params)
+        except ValueError as e:
+            raise ValidationError({"error": str(e)})
+        logs = filter_day_range(logs, 'timestamp', start, end)
+        if params.get('action'):
+            logs = logs.filter(action__icontains=params['action'])
+        return logs.order_by('-timestamp', '-id')
+
+    def list(self, request, *args, **kwargs):
+        # Logs are only ever added, so count and last id are enough to
+        # validate the client's copy. No Last-Modified: buffered entries are
+        # inserted up to a flush interval after their timestamp, so
+        # If-Modified-Since could answer 304 while newer rows exist.
+        return conditional_list(request, self.get_queryset(), lambda: self.render_logs(request, *args, **kwargs))
+
+    def render_logs(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # The unpaginated list keeps its 404 for a user without logs; checked
+        # on the fetched rows rather than with a separate exists() query
+        if isinstance(response.data, list) and not response.data:
+            return Response({'message': 'No logs found for this user.'}, status=status.HTTP_404_NOT_FOUND)
+        return response
 
 
 class StaffLogsView(APIView):
@@ -729,7 +829,7 @@ class StaffLoginView(generics.GenericAPIView):
         staff = serializer.validated_data['staff']
         
         # Log the login action
-        StaffActivityLog.objects.create(staff=staff, action="Logged in")
+        log_staff_activity(staff, "Logged in")
 
         return Response({
             'status': 'success',
@@ -748,12 +848,8 @@ def log_activity(request):
         return Response({"error": "Invalid data"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Save the log entry to the database with current timestamp
-        ActivityLog.objects.create(
-            username=username, 
-            action=action, 
-            timestamp=timezone.now()  # Ensure correct timestamp assignment
-        )
+        # Buffered and written in batches (see activity_log.py)
+        activity_log.log_action(username, action)
         return Response({"message": "Activity logged"}, status=status.HTTP_201_CREATED)
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -788,60 +884,56 @@ def reset_password(request, studentID):
         return Response({"error": "Student not found"}, status=404)
 
 
-def log_staff_activity(staff, action):
-    StaffActivityLog.objects.create(
-        staff=staff, 
-        action=action, 
-        timestamp=timezone.now()  # Explicitly pass the current timestamp
-    )
-    
-def make_naive(value):
-    if isinstance(value, datetime) and value.tzinfo is not None:
-        return value.astimezone(tz=None).replace(tzinfo=None)
-    return value
-
 def export_to_excel(request):
-    current_sem = Semester.objects.first()
+    current_sem = get_current_semester()
     records = Session.objects.filter(
         semester_name=current_sem.semester_name, 
         year=current_sem.year
     )
-    transactions = Transaction.objects.filter(
-        semester_name=current_sem.semester_name, 
-        year=current_sem.year
-    )
-    
 
     if not records.exists():
         return HttpResponse("No data to export.", status=404)
-    
 
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet.title = 'Sessions'
+    # Reuse the cached workbook when the semester's data hasn't changed since
+    # it was built; otherwise build it (write-only, spooled to disk) first
+    watermark, _ = semester_watermark(current_sem.year, current_sem.semester_name)
+    path = build_artifact(current_sem.year, current_sem.semester_name, watermark)
+    filename = export_filename(current_sem.year, current_sem.semester_name)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
 
-    # Headers
-    headers = ['Date', 'StudentID', 'Course','Login Time', 'Logout Time', 'Time Consumed (minutes)', 'Semester', 'School Year']
-    sheet.append(headers)
 
-    # Add data rows
-    for record in records:
-        sheet.append([record.date, record.parent_id, record.course, make_naive(record.loginTime), make_naive(record.logoutTime), record.consumedTime, record.semester_name, record.year])
+class ExportJobView(APIView):
+    def post(self, request):
+        year = request.data.get('year')
+        semester_name = request.data.get('semester_name')
 
-    transaction_sheet = workbook.create_sheet(title='Transactions')
-    transaction_header = ['Reference Number', 'Date and Time', 'Payment(PHP)', 'Semester', 'School Year']
-    transaction_sheet.append(transaction_header)
+        if not year or not semester_name:
+            current_sem = get_current_semester()
+            if not current_sem:
+                return Response({"error": "Semester data not found"}, status=status.HTTP_404_NOT_FOUND)
+            year, semester_name = current_sem.year, current_sem.semester_name
 
-    for t in transactions:
-        transaction_sheet.append([t.reference_number, make_naive(t.timestamp), t.amount, t.semester_name, t.year])
+        job = start_export(year, semester_name)
+        code = status.HTTP_200_OK if job['status'] == 'done' else status.HTTP_202_ACCEPTED
+        return Response(job, status=code)
 
-    # Prepare response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-    )
-    filename = f"{current_sem.semester_name}_{current_sem.year}_records.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-    # Save workbook to response
-    workbook.save(response)
-    return response
\ No newline at end of file
+class ExportJobStatusView(APIView):
+    def get(self, request, job_id):
+        job = get_export_job(job_id)
+        if job is None:
+            return Response({"error": "Export job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job, status=status.HTTP_200_OK)
+
+
+class ExportJobDownloadView(APIView):
+    def get(self, request, job_id):
+        job = get_export_job(job_id)
+        if job is None:
+            return Response({"error": "Export job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        path = job_artifact(job)
+        if path is None:
+            return Response({"error": "Export is not ready", "status": job['status']}, status=status.HTTP_409_CONFLICT)
+
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=job['filename'], content_type=XLSX_CONTENT_TYPE)